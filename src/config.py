@@ -1,68 +1,230 @@
 """
-Configuration settings for the LLM Mafia Game Competition (LOCAL MODELS ONLY).
+Configuration settings for the LLM Mafia Game Competition.
+The API endpoint and model list come from the CONFIG_PROFILE preset (local by default).
 """
 
 import os
+import functools
+from dataclasses import dataclass
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 load_dotenv()
 
-OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "http://localhost:8000/v1/chat/completions")
-
-# OpenAI-совместимый локальный API (например, vLLM)
-# Endpoints:
-# vLLM:         http://localhost:8000/v1/completions
-# text-gen-ui:  http://localhost:5000/v1/completions
-LOCAL_LLM_API_URL = os.getenv("LOCAL_LLM_API_URL", "http://localhost:8000/v1/chat/completions")
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "local_test_key")
-
 # Firebase settings (не изменяем для локального теста)
 FIREBASE_CREDENTIALS_PATH = "firebase_credentials.json"
 
 # Модели - список строк Huggingface
-AVAILABLE_MODELS = [
+LOCAL_MODELS = (
     "gryphe/mythomax-l2-13b",
     "mistralai/mistral-small-24b-instruct-2501",
     "deepseek/deepseek-llm-7b-chat",
     "deepseek/deepseek-r1-distill-llama-70b",
     "nousresearch/hermes-3-llama-3.1-70b",
     "deepseek-ai/DeepSeek-R1-Distill-Qwen-32B",
-]
+)
+
+# Модели, доступные через OpenRouter (slug-и OpenRouter)
+OPENROUTER_MODELS = (
+    "gryphe/mythomax-l2-13b",
+    "mistralai/mistral-small-24b-instruct-2501",
+    "deepseek/deepseek-r1-distill-llama-70b",
+    "nousresearch/hermes-3-llama-3.1-70b",
+)
+
+# Presets selected with the CONFIG_PROFILE environment variable
+CONFIG_PROFILES = MappingProxyType(
+    {
+        "local": MappingProxyType(
+            {
+                "api_url": "http://localhost:8000/v1/chat/completions",
+                "models": LOCAL_MODELS,
+            }
+        ),
+        "openrouter": MappingProxyType(
+            {
+                "api_url": "https://openrouter.ai/api/v1/chat/completions",
+                "models": OPENROUTER_MODELS,
+            }
+        ),
+        "mixed": MappingProxyType(
+            {
+                "api_url": "https://openrouter.ai/api/v1/chat/completions",
+                "models": tuple(dict.fromkeys(OPENROUTER_MODELS + LOCAL_MODELS)),
+                # Модели, которых нет на OpenRouter, идут в LOCAL_LLM_API_URL
+                "local_models": tuple(
+                    model for model in LOCAL_MODELS if model not in OPENROUTER_MODELS
+                ),
+            }
+        ),
+    }
+)
+DEFAULT_PROFILE = "local"
+
+GAME_TYPE = "Classic Mafia"
+
+# Read-only, so it can be shared between threads without copying
+MODEL_CONFIGS = MappingProxyType(
+    {
+        "gryphe/mythomax-l2-13b": MappingProxyType({"timeout": 60}),
+        "mistralai/mistral-small-24b-instruct-2501": MappingProxyType({"timeout": 75}),
+        "deepseek/deepseek-llm-7b-chat": MappingProxyType({"timeout": 60}),
+        "deepseek/deepseek-r1-distill-llama-70b": MappingProxyType({"timeout": 75}),
+        "nousresearch/hermes-3-llama-3.1-70b": MappingProxyType({"timeout": 75}),
+        "deepseek-ai/DeepSeek-R1-Distill-Qwen-32B": MappingProxyType({"timeout": 75}),
+    }
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Settings read from the environment. Immutable and hashable."""
+
+    profile: str
+    models: tuple
+    openrouter_api_url: str
+    api_urls: tuple
+    # Пары (модель, адреса API) для моделей, которые обслуживает не api_urls
+    model_api_urls: tuple
+    local_llm_api_url: str
+    openrouter_api_key: str
+    model_name: str
+    num_games: int
+    parallel_games: int
+    use_processes: bool
+    parallel_discussion: bool
+    players_per_game: int
+    mafia_count: int
+    doctor_count: int
+    language: str
+    max_rounds: int
+    api_timeout: int
+    max_concurrency: int
+    max_output_tokens: int
+    max_msg: int
+    discussion_history_limit: int
+    graph_debug: bool
+    random_seed: int | None
+    unique_models: bool
+    local_mirror_path: str
+    llm_cache_path: str
+    llm_cache_ttl: int
+
+
+@functools.lru_cache(maxsize=1)
+def get_config():
+    """
+    Read the settings from the environment once.
+
+    Returns:
+        Config: The cached settings snapshot.
+    """
+    random_seed = os.getenv("RANDOM_SEED")
+
+    profile = os.getenv("CONFIG_PROFILE", DEFAULT_PROFILE)
+    if profile not in CONFIG_PROFILES:
+        raise ValueError(
+            f"Unknown CONFIG_PROFILE {profile!r}, expected one of {list(CONFIG_PROFILES)}"
+        )
+    preset = CONFIG_PROFILES[profile]
+    openrouter_api_url = os.getenv("OPENROUTER_API_URL", preset["api_url"])
+    # Несколько реплик одного API через запятую; запросы идут по очереди
+    api_urls = tuple(
+        url.strip() for url in os.getenv("LLM_API_URLS", "").split(",") if url.strip()
+    ) or (openrouter_api_url,)
+    # OpenAI-совместимый локальный API (например, vLLM)
+    # Endpoints:
+    # vLLM:         http://localhost:8000/v1/completions
+    # text-gen-ui:  http://localhost:5000/v1/completions
+    local_llm_api_url = os.getenv(
+        "LOCAL_LLM_API_URL", "http://localhost:8000/v1/chat/completions"
+    )
+
+    return Config(
+        profile=profile,
+        models=preset["models"],
+        openrouter_api_url=openrouter_api_url,
+        api_urls=api_urls,
+        model_api_urls=tuple(
+            (model, (local_llm_api_url,)) for model in preset.get("local_models", ())
+        ),
+        local_llm_api_url=local_llm_api_url,
+        openrouter_api_key=os.getenv("OPENROUTER_API_KEY", "local_test_key"),
+        # Можно задать через переменную окружения, иначе дефолт
+        model_name=os.getenv("MODEL_NAME", preset["models"][0]),
+        # Game configuration
+        num_games=int(os.getenv("NUM_GAMES", 1)),
+        # Сколько игр запускать одновременно
+        parallel_games=int(os.getenv("PARALLEL_GAMES", 1)),
+        # Параллельные игры в отдельных процессах, а не потоках
+        use_processes=os.getenv("USE_PROCESSES", "false").lower() == "true",
+        # Параллельные запросы в фазе обсуждения; игроки не видят реплик своего
+        # подраунда, поэтому результаты не сравнимы с обычными играми
+        parallel_discussion=os.getenv("PARALLEL_DISCUSSION", "false").lower() == "true",
+        players_per_game=int(os.getenv("PLAYERS_PER_GAME", 8)),
+        mafia_count=int(os.getenv("MAFIA_COUNT", 2)),
+        doctor_count=int(os.getenv("DOCTOR_COUNT", 1)),
+        language=os.getenv("GAME_LANGUAGE", "English"),
+        max_rounds=int(os.getenv("MAX_ROUNDS", 20)),
+        api_timeout=int(os.getenv("API_TIMEOUT", 60)),
+        # Максимум одновременных запросов к LLM API в одной игре
+        max_concurrency=int(os.getenv("MAX_CONCURRENCY", 4)),
+        max_output_tokens=int(os.getenv("MAX_OUTPUT_TOKENS", 300)),
+        max_msg=int(os.getenv("MAX_MSG", 400)),
+        discussion_history_limit=int(os.getenv("DISCUSSION_HISTORY_LIMIT", 10)),
+        graph_debug=bool(os.getenv("GRAPH_DEBUG", True)),
+        random_seed=int(random_seed) if random_seed is not None else None,
+        unique_models=os.getenv("UNIQUE_MODELS", "true").lower() == "true",
+        # Локальная SQLite-копия результатов игр (пустая строка отключает)
+        local_mirror_path=os.getenv("LOCAL_MIRROR_PATH", "game_mirror.sqlite3"),
+        # Кэш ответов LLM для детерминированных промптов (пустая строка отключает)
+        llm_cache_path=os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3"),
+        llm_cache_ttl=int(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600)),
+    )
+
+
+# Module-level names kept for existing `config.X` call sites
+_config = get_config()
+
+CONFIG_PROFILE = _config.profile
+AVAILABLE_MODELS = _config.models
+MODELS = AVAILABLE_MODELS
 
 # Модель по умолчанию
 DEFAULT_MODEL = AVAILABLE_MODELS[0]
 
-# Можно задать через переменную окружения, иначе дефолт
-MODEL_NAME = os.getenv("MODEL_NAME", DEFAULT_MODEL)
+OPENROUTER_API_URL = _config.openrouter_api_url
+LLM_API_URLS = _config.api_urls
+# Модель -> ее адреса API, если они отличаются от LLM_API_URLS
+MODEL_API_URLS = MappingProxyType(dict(_config.model_api_urls))
+LOCAL_LLM_API_URL = _config.local_llm_api_url
+OPENROUTER_API_KEY = _config.openrouter_api_key
 
+MODEL_NAME = _config.model_name
 CLAUDE_3_7_SONNET = MODEL_NAME
 
-# Game configuration
-NUM_GAMES = int(os.getenv("NUM_GAMES", 1))
-PLAYERS_PER_GAME = int(os.getenv("PLAYERS_PER_GAME", 8))
-MAFIA_COUNT = int(os.getenv("MAFIA_COUNT", 2))
-DOCTOR_COUNT = int(os.getenv("DOCTOR_COUNT", 1))
+NUM_GAMES = _config.num_games
+PARALLEL_GAMES = _config.parallel_games
+USE_PROCESSES = _config.use_processes
+PARALLEL_DISCUSSION = _config.parallel_discussion
+PLAYERS_PER_GAME = _config.players_per_game
+MAFIA_COUNT = _config.mafia_count
+DOCTOR_COUNT = _config.doctor_count
 
-GAME_TYPE = "Classic Mafia"
-LANGUAGE = os.getenv("GAME_LANGUAGE", "English")
-MAX_ROUNDS = int(os.getenv("MAX_ROUNDS", 20))
-API_TIMEOUT = int(os.getenv("API_TIMEOUT", 60))
-MAX_OUTPUT_TOKENS = int(os.getenv("MAX_OUTPUT_TOKENS", 300))
-MAX_MSG = int(os.getenv("MAX_MSG", 400))
-DISCUSSION_HISTORY_LIMIT = int(os.getenv("DISCUSSION_HISTORY_LIMIT", 10))
-GRAPH_DEBUG = bool(os.getenv("GRAPH_DEBUG", True))
-
-MODEL_CONFIGS = {
-    "gryphe/mythomax-l2-13b": {"timeout": 60},
-    "mistralai/mistral-small-24b-instruct-2501": {"timeout": 75},
-    "deepseek/deepseek-llm-7b-chat": {"timeout": 60},
-    "deepseek/deepseek-r1-distill-llama-70b": {"timeout": 75},
-    "nousresearch/hermes-3-llama-3.1-70b": {"timeout": 75},
-    "deepseek-ai/DeepSeek-R1-Distill-Qwen-32B": {"timeout": 75},
-}
-
-RANDOM_SEED = os.getenv("RANDOM_SEED")
-if RANDOM_SEED is not None:
-    RANDOM_SEED = int(RANDOM_SEED)
-
-UNIQUE_MODELS = os.getenv("UNIQUE_MODELS", "true").lower() == "true"
+LANGUAGE = _config.language
+MAX_ROUNDS = _config.max_rounds
+API_TIMEOUT = _config.api_timeout
+MAX_CONCURRENCY = _config.max_concurrency
+MAX_OUTPUT_TOKENS = _config.max_output_tokens
+MAX_MSG = _config.max_msg
+DISCUSSION_HISTORY_LIMIT = _config.discussion_history_limit
+GRAPH_DEBUG = _config.graph_debug
+
+RANDOM_SEED = _config.random_seed
+
+UNIQUE_MODELS = _config.unique_models
+
+LOCAL_MIRROR_PATH = _config.local_mirror_path
+
+LLM_CACHE_PATH = _config.llm_cache_path
+LLM_CACHE_TTL = _config.llm_cache_ttl
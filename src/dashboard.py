@@ -19,7 +19,7 @@ from firebase_manager import FirebaseManager
 from flask_caching import Cache
 
 app = Flask(__name__, static_folder="static", template_folder="templates")
-firebase = FirebaseManager()
+firebase = FirebaseManager.instance()
 
 # Configure Flask-Caching
 cache_config = {
@@ -41,7 +41,7 @@ def _jinja2_filter_strftime(timestamp):
 
 
 # Data models for type safety and validation
-@dataclass
+@dataclass(slots=True)
 class ModelStats:
     games_played: int
     games_won: int
@@ -57,7 +57,7 @@ class ModelStats:
     doctor_win_rate: float
 
 
-@dataclass
+@dataclass(slots=True)
 class GameResult:
     game_id: str
     timestamp: int
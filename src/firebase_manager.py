@@ -3,11 +3,27 @@ Firebase manager for the LLM Mafia Game Competition.
 """
 
 import json
+import logging
 import time
+import concurrent.futures
+import datetime
+import functools
+from array import array
+from dataclasses import dataclass, asdict, fields
+from collections import defaultdict
+import numpy as np
 import firebase_admin
 from firebase_admin import credentials, firestore
+from firebase_admin import exceptions as firebase_exceptions
+from google.api_core import exceptions as google_api_exceptions
+from google.api_core import retry
+from google.auth import exceptions as google_auth_exceptions
 import os
 import sys
+import sqlite3
+import threading
+import requests
+from requests.adapters import HTTPAdapter
 
 # Add flexible import handling
 try:
@@ -17,21 +33,667 @@ except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     import config
 
+logger = logging.getLogger(__name__)
+
+# Errors expected from Firebase calls (service errors, auth and network
+# failures). Anything else is a bug and is left to propagate.
+FIREBASE_ERRORS = (
+    firebase_exceptions.FirebaseError,
+    google_api_exceptions.GoogleAPIError,
+    google_auth_exceptions.TransportError,
+    requests.exceptions.ConnectionError,
+)
+
+# Backoff for batch commits: 0.2s doubling up to 5s, for at most 30s. Only
+# errors raised before the write is applied are retried, because the stats
+# increments in a batch are not idempotent.
+WRITE_RETRY = retry.Retry(
+    predicate=retry.if_exception_type(
+        google_api_exceptions.ServiceUnavailable,
+        google_api_exceptions.ResourceExhausted,
+    ),
+    initial=0.2,
+    maximum=5.0,
+    multiplier=2.0,
+    timeout=30.0,
+)
+
+# Firestore REST endpoint used for the read-only game results query
+FIRESTORE_REST_URL = "https://firestore.googleapis.com/v1"
+
+# Refresh the cached access token this long before it expires
+TOKEN_REFRESH_MARGIN = datetime.timedelta(seconds=60)
+
+# Concurrent range queries used when loading the game history
+HISTORY_FETCH_WORKERS = 8
+
+# Firestore limit on the number of writes in one batch commit
+MAX_BATCH_WRITES = 500
+
+# Legacy games counted per sync transaction: one write per game plus one per
+# model and the stats version bump leave room under MAX_BATCH_WRITES
+SYNC_CHUNK_GAMES = 200
+
+
+@dataclass(slots=True)
+class ModelStats:
+    """Raw per-model game and win counters."""
+
+    games_played: int = 0
+    games_won: int = 0
+    mafia_games: int = 0
+    mafia_wins: int = 0
+    villager_games: int = 0
+    villager_wins: int = 0
+    doctor_games: int = 0
+    doctor_wins: int = 0
+
+    @property
+    def win_rate(self):
+        return self.games_won / self.games_played if self.games_played > 0 else 0
+
+    @property
+    def mafia_win_rate(self):
+        return self.mafia_wins / self.mafia_games if self.mafia_games > 0 else 0
+
+    @property
+    def villager_win_rate(self):
+        return (
+            self.villager_wins / self.villager_games if self.villager_games > 0 else 0
+        )
+
+    @property
+    def doctor_win_rate(self):
+        return self.doctor_wins / self.doctor_games if self.doctor_games > 0 else 0
+
+
+STATS_COUNTERS = tuple(field.name for field in fields(ModelStats))
+
+# Game fields read when (re)building the model stats
+STATS_FIELDS = ("game_id", "timestamp", "winner", "participants", "stats_applied")
+
+# Role -> (games counter, wins counter, team that has to win)
+ROLE_KEYS = {
+    "Mafia": ("mafia_games", "mafia_wins", "Mafia"),
+    "Doctor": ("doctor_games", "doctor_wins", "Villagers"),
+    "Villager": ("villager_games", "villager_wins", "Villagers"),
+}
+
+# Compact role codes used by the stats aggregation. Participant roles may be
+# stored either as the role string or as its code.
+_ROLE_TO_CODE = {role: code for code, role in enumerate(ROLE_KEYS)}
+_CODE_TO_ROLE = {code: role for role, code in _ROLE_TO_CODE.items()}
+UNKNOWN_ROLE_ID = len(_ROLE_TO_CODE)
+TEAM_IDS = {"Mafia": 0, "Villagers": 1}
+ROLE_WINNING_TEAM_IDS = np.array(
+    [TEAM_IDS[ROLE_KEYS[role][2]] for role in _ROLE_TO_CODE] + [-2], dtype=np.int32
+)
+
+
+def _stats_doc_id(model):
+    """Map a model name to a valid Firestore document ID."""
+    return model.replace("/", "__")
+
+
+@functools.lru_cache(maxsize=None)
+def _counters_to_increment(role, winner):
+    """
+    Return the counters a player with this role increments for this winner.
+
+    ROLE_KEYS is resolved once per (role, winner) pair, leaving the
+    aggregation loop with no role or winner comparisons.
+    """
+    role_keys = ROLE_KEYS.get(_CODE_TO_ROLE.get(role, role))
+    if role_keys is None:
+        return ("games_played",)
+    games_key, wins_key, winning_team = role_keys
+    if winner == winning_team:
+        return ("games_played", games_key, "games_won", wins_key)
+    return ("games_played", games_key)
+
+
+def _new_stats():
+    """Return an empty per-model stats table that creates counters on demand."""
+    return defaultdict(ModelStats)
+
+
+def _apply_game_to_stats(stats, game):
+    """
+    Add a single game's outcome to per-model counters.
+
+    Args:
+        stats (defaultdict): Table from _new_stats(), updated in place.
+        game (dict): Game result with "winner" and "participants".
+
+    Returns:
+        defaultdict: The updated stats.
+    """
+    winner = game.get("winner")
+    participants = game.get("participants", {})
+
+    for player_name, data in participants.items():
+        # Handle both old and new format
+        if isinstance(data, dict):
+            role = data.get("role")
+            model = data.get("model_name", player_name)  # Use player_name as fallback
+        else:
+            # Legacy format where data is just the role string
+            role = data
+            model = player_name  # In legacy format, the key was the model name
+
+        counters = stats[model]
+        for key in _counters_to_increment(role, winner):
+            setattr(counters, key, getattr(counters, key) + 1)
+
+    return stats
+
+
+def _iter_participations(games):
+    """Yield (model, role, winner) for every player of every game."""
+    for game in games:
+        winner = game.get("winner")
+        for player_name, data in game.get("participants", {}).items():
+            if isinstance(data, dict):
+                yield data.get("model_name", player_name), data.get("role"), winner
+            else:
+                yield player_name, data, winner
+
+
+def _aggregate_games(games):
+    """
+    Compute per-model counters for many games at once.
+
+    Same result as folding _apply_game_to_stats over the games, but the
+    counting is done with np.bincount over flat model/role/winner columns.
+    The games are consumed once, so a generator can be passed.
+
+    Args:
+        games (iterable): Game result dicts with "winner" and "participants".
+
+    Returns:
+        dict: Mapping of model name to ModelStats.
+    """
+    # Single pass over the (possibly streamed) games into compact int columns
+    model_index = {}
+    model_ids, role_ids, winner_ids = array("i"), array("i"), array("i")
+    for model, role, winner in _iter_participations(games):
+        model_ids.append(model_index.setdefault(model, len(model_index)))
+        role_ids.append(
+            role if role in _CODE_TO_ROLE else _ROLE_TO_CODE.get(role, UNKNOWN_ROLE_ID)
+        )
+        winner_ids.append(TEAM_IDS.get(winner, -1))
+
+    if not model_ids:
+        return {}
+
+    model_ids = np.frombuffer(model_ids, dtype=np.intc)
+    role_ids = np.frombuffer(role_ids, dtype=np.intc)
+    winner_ids = np.frombuffer(winner_ids, dtype=np.intc)
+    won = ROLE_WINNING_TEAM_IDS[role_ids] == winner_ids
+
+    num_models = len(model_index)
+    columns = {
+        "games_played": np.bincount(model_ids, minlength=num_models),
+        "games_won": np.bincount(model_ids, weights=won, minlength=num_models),
+    }
+    for role, role_id in _ROLE_TO_CODE.items():
+        games_key, wins_key, _ = ROLE_KEYS[role]
+        is_role = role_ids == role_id
+        columns[games_key] = np.bincount(model_ids, weights=is_role, minlength=num_models)
+        columns[wins_key] = np.bincount(
+            model_ids, weights=is_role & won, minlength=num_models
+        )
+
+    # Plain ints: Firestore cannot serialize numpy scalars
+    return {
+        model: ModelStats(*(int(columns[key][idx]) for key in STATS_COUNTERS))
+        for model, idx in model_index.items()
+    }
+
+
+def asdict_with_rates(stats):
+    """
+    Serialize a stats table, adding the derived win rates.
+
+    Args:
+        stats (dict): Mapping of model name to ModelStats.
+
+    Returns:
+        dict: Mapping of model name to counters and win rates.
+    """
+    return {
+        model: {
+            **asdict(counters),
+            "win_rate": counters.win_rate,
+            "mafia_win_rate": counters.mafia_win_rate,
+            "villager_win_rate": counters.villager_win_rate,
+            "doctor_win_rate": counters.doctor_win_rate,
+        }
+        for model, counters in stats.items()
+    }
+
+
+def _decode_value(value):
+    """
+    Convert a Firestore REST typed value to a plain Python value.
+
+    Args:
+        value (dict): Typed value, e.g. {"integerValue": "3"}.
+
+    Returns:
+        The decoded value.
+    """
+    if "mapValue" in value:
+        return {
+            key: _decode_value(item)
+            for key, item in value["mapValue"].get("fields", {}).items()
+        }
+    if "arrayValue" in value:
+        return [_decode_value(item) for item in value["arrayValue"].get("values", [])]
+    if "integerValue" in value:
+        return int(value["integerValue"])
+    if "nullValue" in value:
+        return None
+    # stringValue, booleanValue, doubleValue, timestampValue, ...
+    return next(iter(value.values()), None)
+
+
+def _get_app():
+    """
+    Return the process-wide Firebase app, initializing it on first use.
+
+    The SDK keeps its own pooled channels per app, so every FirebaseManager
+    shares one app instead of re-reading credentials and reconnecting.
+    """
+    try:
+        return firebase_admin.get_app()
+    except ValueError:
+        cred = credentials.Certificate(config.FIREBASE_CREDENTIALS_PATH)
+        return firebase_admin.initialize_app(cred)
+
 
 class FirebaseManager:
     """Manages Firebase database operations for the Mafia game."""
 
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        """
+        Return the process-wide FirebaseManager, creating it on first use.
+
+        Returns:
+            FirebaseManager: The shared manager.
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
     def __init__(self):
         """Initialize the Firebase manager."""
+        # Pooled HTTP session for REST calls made outside the SDK
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # The local mirror works even when Firebase is unavailable
+        self._mirror_lock = threading.Lock()
+        self._mirror = self._open_mirror(config.LOCAL_MIRROR_PATH)
+
+        # Model stats from the last read, valid while the stats version is unchanged
+        self._stats_cache = None
+        self._stats_cache_version = None
+
+        # Access token for REST reads, reused until shortly before it expires
+        self._rest_token_lock = threading.Lock()
+        self._rest_token_value = None
+        self._rest_token_expiry = None
+
         try:
-            cred = credentials.Certificate(config.FIREBASE_CREDENTIALS_PATH)
-            firebase_admin.initialize_app(cred)
-            self.db = firestore.client()
+            self._app = _get_app()
+            self.db = firestore.client(self._app)
+            self._games_ref = self.db.collection("mafia_games")
+            self._logs_ref = self.db.collection("game_logs")
+            self._stats_ref = self.db.collection("model_stats")
+            # Bumped by every write of model stats deltas
+            self._stats_version_ref = self.db.collection("model_stats_meta").document(
+                "version"
+            )
             self.initialized = True
-            print("Firebase initialized successfully.")
-        except Exception as e:
-            print(f"Error initializing Firebase: {e}")
+            logger.info("Firebase initialized successfully.")
+        except (OSError, ValueError, *FIREBASE_ERRORS) as e:
+            logger.error("Error initializing Firebase: %s", e)
+            self.initialized = False
+            return
+
+    @staticmethod
+    def _open_mirror(path):
+        """
+        Open the local SQLite mirror of the game results.
+
+        Args:
+            path (str): Database file path, or an empty string to disable the mirror.
+
+        Returns:
+            sqlite3.Connection: The open connection, or None if disabled or unavailable.
+        """
+        if not path:
+            return None
+
+        try:
+            connection = sqlite3.connect(path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS games ("
+                "game_id TEXT PRIMARY KEY, "
+                "ts INTEGER NOT NULL, "
+                "winner TEXT, "
+                "participants_json TEXT NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS games_ts ON games (ts)")
+            connection.commit()
+            return connection
+        except sqlite3.Error as e:
+            logger.error("Error opening local mirror: %s", e)
+            return None
+
+    def _mirror_games(self, games):
+        """
+        Copy game results into the local mirror.
+
+        Args:
+            games (iterable): Game result dicts with game_id, timestamp,
+                winner and participants.
+
+        Returns:
+            int: Number of rows inserted (games already mirrored are skipped).
+        """
+        if self._mirror is None:
+            return 0
+
+        rows = (
+            (
+                game["game_id"],
+                game.get("timestamp", 0),
+                game.get("winner"),
+                json.dumps(game.get("participants", {})),
+            )
+            for game in games
+            if game.get("game_id")
+        )
+        try:
+            with self._mirror_lock, self._mirror:
+                cursor = self._mirror.executemany(
+                    "INSERT OR IGNORE INTO games VALUES (?, ?, ?, ?)", rows
+                )
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error("Error writing local mirror: %s", e)
+            return 0
+
+    def sync(self):
+        """
+        Catch up the model stats and the local mirror with the stored games.
+
+        Not run on construction: on a fresh mirror it downloads the whole
+        game history, which readers such as the dashboard do not need at
+        import. Writers call it once at startup.
+        """
+        self.sync_model_stats()
+        self.sync_local_mirror()
+
+    def sync_local_mirror(self):
+        """
+        Copy games from the second of the latest mirrored game on from
+        Firebase into the local mirror. On a fresh mirror this loads the
+        whole history once.
+
+        Returns:
+            int: Number of games added to the mirror.
+        """
+        if self._mirror is None or not self.initialized:
+            return 0
+
+        try:
+            with self._mirror_lock:
+                (latest,) = self._mirror.execute(
+                    "SELECT COALESCE(MAX(ts), -1) FROM games"
+                ).fetchone()
+            return self._mirror_games(self._fetch_games_since(latest))
+        except (sqlite3.Error, *FIREBASE_ERRORS) as e:
+            logger.error("Error syncing local mirror: %s", e)
+            return 0
+
+    def close(self):
+        """Close the HTTP session and release the Firebase app."""
+        self.session.close()
+        if self._mirror is not None:
+            self._mirror.close()
+            self._mirror = None
+        if self.initialized:
+            firebase_admin.delete_app(self._app)
             self.initialized = False
+        if FirebaseManager._instance is self:
+            FirebaseManager._instance = None
+
+    def _add_game_result(
+        self,
+        batch,
+        timestamp,
+        game_id,
+        winner,
+        participants,
+        game_type,
+        language,
+        update_stats=True,
+    ):
+        """
+        Add the game result and its model stats delta to a write batch.
+
+        With update_stats=False the caller adds the stats delta of the game
+        to the same batch itself (e.g. summed over several games).
+        """
+        game_data = {
+            "game_id": game_id,
+            "timestamp": timestamp,
+            "game_type": game_type,
+            "language": language,
+            "participant_count": len(participants),
+            "winner": winner,
+            "participants": participants,
+            # Counted in model_stats by this same batch
+            "stats_applied": True,
+        }
+        batch.set(self._games_ref.document(game_id), game_data)
+        if update_stats:
+            self._update_model_stats(
+                _apply_game_to_stats(_new_stats(), game_data), batch=batch
+            )
+        self._add_model_games(batch, game_data)
+        return game_data
+
+    def _add_model_games(self, batch, game_data):
+        """
+        Add the game to the per-model history index in a write batch.
+
+        Each model gets model_stats/<model>/games/<game_id> with the roles it
+        played, so a model's history is read without scanning all games.
+        """
+        players_by_model = defaultdict(dict)
+        for player_name, data in game_data["participants"].items():
+            if isinstance(data, dict):
+                model = data.get("model_name", player_name)
+                players_by_model[model][player_name] = data.get("role")
+
+        for model, players in players_by_model.items():
+            batch.set(
+                self._model_games_ref(model).document(game_data["game_id"]),
+                {
+                    "game_id": game_data["game_id"],
+                    "timestamp": game_data["timestamp"],
+                    "winner": game_data["winner"],
+                    "players": players,
+                },
+            )
+
+    def _model_games_ref(self, model):
+        """Return the history index collection of a model."""
+        return self._stats_ref.document(_stats_doc_id(model)).collection("games")
+
+    def _add_game_log(
+        self,
+        batch,
+        timestamp,
+        game_id,
+        rounds,
+        participants,
+        game_type,
+        language,
+        critic_review,
+    ):
+        """Add the game log to a write batch."""
+        log_data = {
+            "game_id": game_id,
+            "timestamp": timestamp,
+            "game_type": game_type,
+            "language": language,
+            "participant_count": len(participants),
+            "rounds": rounds,
+        }
+
+        # Add critic review if available
+        if critic_review:
+            log_data["critic_review"] = critic_review
+
+        batch.set(self._logs_ref.document(game_id), log_data)
+
+    def store_game_bundle(
+        self,
+        game_id,
+        winner,
+        participants,
+        rounds,
+        game_type=config.GAME_TYPE,
+        language=config.LANGUAGE,
+        critic_review=None,
+    ):
+        """
+        Store the result, the log and the model stats delta of a game in one
+        atomic batch write (a single round-trip).
+
+        Args:
+            game_id (str): Unique identifier for the game.
+            winner (str): The winning team ("Mafia" or "Villagers").
+            participants (dict): Dictionary mapping model names to role and player_name.
+            rounds (list): List of round data.
+            game_type (str, optional): Type of Mafia game played.
+            language (str, optional): Language used for the game.
+            critic_review (dict, optional): Game critic review with title and content.
+
+        Returns:
+            bool: True if successful, False otherwise.
+        """
+        if not self.initialized:
+            logger.warning("Firebase not initialized. Cannot store game.")
+            return False
+
+        try:
+            # One timestamp for the result and the log of the same game
+            timestamp = int(time.time())
+            batch = self.db.batch()
+            game_data = self._add_game_result(
+                batch, timestamp, game_id, winner, participants, game_type, language
+            )
+            self._add_game_log(
+                batch,
+                timestamp,
+                game_id,
+                rounds,
+                participants,
+                game_type,
+                language,
+                critic_review,
+            )
+            batch.commit(retry=WRITE_RETRY)
+            self._mirror_games([game_data])
+            return True
+        except FIREBASE_ERRORS as e:
+            logger.error("Error storing game: %s", e)
+            return False
+
+    def store_game_bundles(self, bundles, game_type=config.GAME_TYPE):
+        """
+        Store several games like store_game_bundle, in as few batch commits
+        as the Firestore write limit allows. The model stats deltas of the
+        games in one commit are summed into one write per model.
+
+        Args:
+            bundles (list): Tuples of (game_id, winner, participants, rounds,
+                language, critic_review).
+            game_type (str, optional): Type of Mafia game played.
+
+        Returns:
+            bool: True if all games were stored, False otherwise.
+        """
+        if not bundles:
+            return True
+        if not self.initialized:
+            logger.warning("Firebase not initialized. Cannot store games.")
+            return False
+
+        # Result, log, and at most a history entry and a stats update per
+        # player; plus the stats version bump once per chunk
+        chunks, chunk, writes = [], [], 1
+        for bundle in bundles:
+            game_writes = 2 + 2 * len(bundle[2])
+            if chunk and writes + game_writes > MAX_BATCH_WRITES:
+                chunks.append(chunk)
+                chunk, writes = [], 1
+            chunk.append(bundle)
+            writes += game_writes
+        chunks.append(chunk)
+
+        stored_all = True
+        for chunk in chunks:
+            try:
+                timestamp = int(time.time())
+                batch = self.db.batch()
+                games = []
+                for game_id, winner, participants, rounds, language, critic_review in chunk:
+                    games.append(
+                        self._add_game_result(
+                            batch,
+                            timestamp,
+                            game_id,
+                            winner,
+                            participants,
+                            game_type,
+                            language,
+                            update_stats=False,
+                        )
+                    )
+                    self._add_game_log(
+                        batch,
+                        timestamp,
+                        game_id,
+                        rounds,
+                        participants,
+                        game_type,
+                        language,
+                        critic_review,
+                    )
+                self._update_model_stats(_aggregate_games(games), batch=batch)
+                batch.commit(retry=WRITE_RETRY)
+                self._mirror_games(games)
+            except FIREBASE_ERRORS as e:
+                logger.error("Error storing %d games: %s", len(chunk), e)
+                stored_all = False
+        return stored_all
 
     def store_game_result(
         self,
@@ -44,6 +706,8 @@ class FirebaseManager:
         """
         Store the result of a game in Firebase.
 
+        Prefer store_game_bundle when the game log is also available.
+
         Args:
             game_id (str): Unique identifier for the game.
             winner (str): The winning team ("Mafia" or "Villagers").
@@ -55,26 +719,25 @@ class FirebaseManager:
             bool: True if successful, False otherwise.
         """
         if not self.initialized:
-            print("Firebase not initialized. Cannot store game result.")
+            logger.warning("Firebase not initialized. Cannot store game result.")
             return False
 
         try:
-            # Create game result data
-            game_data = {
-                "game_id": game_id,
-                "timestamp": int(time.time()),
-                "game_type": game_type,
-                "language": language,
-                "participant_count": len(participants),
-                "winner": winner,
-                "participants": participants,
-            }
-
-            # Store in Firebase
-            self.db.collection("mafia_games").document(game_id).set(game_data)
+            batch = self.db.batch()
+            game_data = self._add_game_result(
+                batch,
+                int(time.time()),
+                game_id,
+                winner,
+                participants,
+                game_type,
+                language,
+            )
+            batch.commit(retry=WRITE_RETRY)
+            self._mirror_games([game_data])
             return True
-        except Exception as e:
-            print(f"Error storing game result: {e}")
+        except FIREBASE_ERRORS as e:
+            logger.error("Error storing game result: %s", e)
             return False
 
     def store_game_log(
@@ -89,6 +752,8 @@ class FirebaseManager:
         """
         Store the log of a game in Firebase.
 
+        Prefer store_game_bundle when the game result is also available.
+
         Args:
             game_id (str): Unique identifier for the game.
             rounds (list): List of round data.
@@ -101,29 +766,25 @@ class FirebaseManager:
             bool: True if successful, False otherwise.
         """
         if not self.initialized:
-            print("Firebase not initialized. Cannot store game log.")
+            logger.warning("Firebase not initialized. Cannot store game log.")
             return False
 
         try:
-            # Create game log data
-            log_data = {
-                "game_id": game_id,
-                "timestamp": int(time.time()),
-                "game_type": game_type,
-                "language": language,
-                "participant_count": len(participants),
-                "rounds": rounds,
-            }
-
-            # Add critic review if available
-            if critic_review:
-                log_data["critic_review"] = critic_review
-
-            # Store in Firebase
-            self.db.collection("game_logs").document(game_id).set(log_data)
+            batch = self.db.batch()
+            self._add_game_log(
+                batch,
+                int(time.time()),
+                game_id,
+                rounds,
+                participants,
+                game_type,
+                language,
+                critic_review,
+            )
+            batch.commit(retry=WRITE_RETRY)
             return True
-        except Exception as e:
-            print(f"Error storing game log: {e}")
+        except FIREBASE_ERRORS as e:
+            logger.error("Error storing game log: %s", e)
             return False
 
     def get_game_results(self, limit=100):
@@ -137,122 +798,362 @@ class FirebaseManager:
             list: List of game results.
         """
         if not self.initialized:
-            print("Firebase not initialized. Cannot get game results.")
+            logger.warning("Firebase not initialized. Cannot get game results.")
             return []
 
         try:
             # Query Firestore for game results, ordered by timestamp
-            results = (
-                self.db.collection("mafia_games")
-                .order_by("timestamp", direction=firestore.Query.DESCENDING)
-                .limit(limit)
-                .stream()
+            return self._rest_run_query(
+                {
+                    "from": [{"collectionId": self._games_ref.id}],
+                    "orderBy": [
+                        {
+                            "field": {"fieldPath": "timestamp"},
+                            "direction": "DESCENDING",
+                        }
+                    ],
+                    "limit": limit,
+                }
             )
-
-            # Convert to list
-            return [doc.to_dict() for doc in results]
-        except Exception as e:
-            print(f"Error getting game results: {e}")
+        except (requests.exceptions.RequestException, *FIREBASE_ERRORS) as e:
+            logger.error("Error getting game results: %s", e)
             return []
 
+    def _rest_token(self):
+        """
+        Return an OAuth access token for the REST API, minting a new one
+        only when the cached token is about to expire.
+
+        Returns:
+            str: The access token.
+        """
+        with self._rest_token_lock:
+            # google-auth reports the expiry as naive UTC
+            now = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+            if (
+                self._rest_token_value is None
+                or self._rest_token_expiry is None
+                or now >= self._rest_token_expiry - TOKEN_REFRESH_MARGIN
+            ):
+                token = self._app.credential.get_access_token()
+                self._rest_token_value = token.access_token
+                self._rest_token_expiry = token.expiry
+            return self._rest_token_value
+
+    def _rest_run_query(self, structured_query):
+        """
+        Run a read-only Firestore query over REST with the pooled HTTP session.
+
+        This skips the SDK's per-call object construction on the dashboard's
+        hot read path; writes still go through the SDK.
+
+        Args:
+            structured_query (dict): Firestore REST StructuredQuery.
+
+        Returns:
+            list: Matching documents as plain dicts.
+        """
+        url = (
+            f"{FIRESTORE_REST_URL}/projects/{self._app.project_id}"
+            "/databases/(default)/documents:runQuery"
+        )
+        response = self.session.post(
+            url,
+            json={"structuredQuery": structured_query},
+            headers={"Authorization": f"Bearer {self._rest_token()}"},
+            timeout=config.API_TIMEOUT,
+        )
+        response.raise_for_status()
+
+        # Items without a "document" only carry the read time
+        return [
+            _decode_value({"mapValue": item["document"]})
+            for item in response.json()
+            if "document" in item
+        ]
+
     def get_model_stats(self):
         """
         Get statistics for each model from Firebase.
 
+        The counters are maintained incrementally in the "model_stats"
+        collection by store_game_result, so this is a single small read
+        instead of a scan over the game history. Win rates are derived here.
+        The result is cached until the stats version changes, i.e. until
+        any process writes new stats deltas.
+
+        Falls back to the local mirror when Firebase is unavailable.
+
         Returns:
             dict: Dictionary mapping model names to statistics.
         """
         if not self.initialized:
-            print("Firebase not initialized. Cannot get model stats.")
+            if self._mirror is not None:
+                return self.get_local_model_stats()
+            logger.warning("Firebase not initialized. Cannot get model stats.")
             return {}
 
         try:
-            # Get all game results
-            results = self.get_game_results(limit=1000)
+            version_doc = self._stats_version_ref.get()
+            version = version_doc.to_dict().get("version") if version_doc.exists else None
+            if version is not None and version == self._stats_cache_version:
+                return self._copy_stats_cache()
 
-            # Initialize stats
             stats = {}
+            for doc in self._stats_ref.stream():
+                data = doc.to_dict()
+                model = data.pop("model_name", doc.id)
+                stats[model] = ModelStats(
+                    **{key: data.get(key, 0) for key in STATS_COUNTERS}
+                )
 
-            # Process each game
-            for game in results:
-                winner = game.get("winner")
-                participants = game.get("participants", {})
-
-                for player_name, data in participants.items():
-                    # Handle both old and new format
-                    if isinstance(data, dict):
-                        role = data.get("role")
-                        model = data.get(
-                            "model_name", player_name
-                        )  # Use player_name as fallback
-                    else:
-                        # Legacy format where data is just the role string
-                        role = data
-                        model = (
-                            player_name  # In legacy format, the key was the model name
-                        )
+            self._stats_cache = asdict_with_rates(stats)
+            self._stats_cache_version = version
+            return self._copy_stats_cache()
+        except FIREBASE_ERRORS as e:
+            logger.error("Error getting model stats: %s", e)
+            return {}
 
-                    # Initialize model stats if not exists
-                    if model not in stats:
-                        stats[model] = {
-                            "games_played": 0,
-                            "games_won": 0,
-                            "mafia_games": 0,
-                            "mafia_wins": 0,
-                            "villager_games": 0,
-                            "villager_wins": 0,
-                            "doctor_games": 0,
-                            "doctor_wins": 0,
-                        }
+    def _copy_stats_cache(self):
+        """
+        Return a copy of the cached model stats, so callers that change the
+        result do not change what later reads get.
 
-                    # Update games played
-                    stats[model]["games_played"] += 1
-
-                    # Update role-specific stats
-                    if role == "Mafia":
-                        stats[model]["mafia_games"] += 1
-                        if winner == "Mafia":
-                            stats[model]["mafia_wins"] += 1
-                            stats[model]["games_won"] += 1
-                    elif role == "Doctor":
-                        stats[model]["doctor_games"] += 1
-                        if winner == "Villagers":
-                            stats[model]["doctor_wins"] += 1
-                            stats[model]["games_won"] += 1
-                    elif role == "Villager":
-                        stats[model]["villager_games"] += 1
-                        if winner == "Villagers":
-                            stats[model]["villager_wins"] += 1
-                            stats[model]["games_won"] += 1
-
-            # Calculate win rates
-            for model in stats:
-                stats[model]["win_rate"] = (
-                    stats[model]["games_won"] / stats[model]["games_played"]
-                    if stats[model]["games_played"] > 0
-                    else 0
-                )
-                stats[model]["mafia_win_rate"] = (
-                    stats[model]["mafia_wins"] / stats[model]["mafia_games"]
-                    if stats[model]["mafia_games"] > 0
-                    else 0
-                )
-                stats[model]["villager_win_rate"] = (
-                    stats[model]["villager_wins"] / stats[model]["villager_games"]
-                    if stats[model]["villager_games"] > 0
-                    else 0
-                )
-                stats[model]["doctor_win_rate"] = (
-                    stats[model]["doctor_wins"] / stats[model]["doctor_games"]
-                    if stats[model]["doctor_games"] > 0
-                    else 0
-                )
+        Returns:
+            dict: Model names to their own stats dicts.
+        """
+        return {model: dict(stats) for model, stats in self._stats_cache.items()}
+
+    def get_model_history(self, model, limit=50):
+        """
+        Get the most recent games played by a model.
+
+        Args:
+            model (str): Model name.
+            limit (int, optional): Maximum number of games to retrieve.
+
+        Returns:
+            list: Dicts with game_id, timestamp, winner and players (player
+                name to role), newest first.
+        """
+        if not self.initialized:
+            logger.warning("Firebase not initialized. Cannot get model history.")
+            return []
+
+        try:
+            history = (
+                self._model_games_ref(model)
+                .order_by("timestamp", direction=firestore.Query.DESCENDING)
+                .limit(limit)
+                .stream()
+            )
+            return [doc.to_dict() for doc in history]
+        except FIREBASE_ERRORS as e:
+            logger.error("Error getting model history: %s", e)
+            return []
 
-            return stats
-        except Exception as e:
-            print(f"Error getting model stats: {e}")
+    def get_local_model_stats(self, limit=None):
+        """
+        Compute model statistics from the local mirror, without any network access.
+
+        Args:
+            limit (int, optional): Only count the most recent games.
+
+        Returns:
+            dict: Dictionary mapping model names to statistics.
+        """
+        if self._mirror is None:
+            logger.warning("Local mirror disabled. Cannot get model stats.")
             return {}
 
+        try:
+            with self._mirror_lock:
+                rows = self._mirror.execute(
+                    "SELECT winner, participants_json FROM games "
+                    "ORDER BY ts DESC LIMIT ?",
+                    (-1 if limit is None else limit,),
+                ).fetchall()
+
+            games = (
+                {"winner": winner, "participants": json.loads(participants)}
+                for winner, participants in rows
+            )
+            return asdict_with_rates(_aggregate_games(games))
+        except sqlite3.Error as e:
+            logger.error("Error reading local mirror: %s", e)
+            return {}
+
+    def _update_model_stats(self, delta, batch=None):
+        """
+        Add per-model counter deltas to the persisted model stats.
+
+        Args:
+            delta (dict): Mapping of model name to ModelStats increments.
+            batch (WriteBatch, optional): Batch (or transaction) to add the
+                writes to. If not given, a new batch is created and committed.
+        """
+        if not delta:
+            return
+
+        commit = batch is None
+        if commit:
+            batch = self.db.batch()
+        for model, counters in delta.items():
+            update = {"model_name": model}
+            for key, value in asdict(counters).items():
+                if value:
+                    update[key] = firestore.Increment(value)
+            batch.set(
+                self._stats_ref.document(_stats_doc_id(model)),
+                update,
+                merge=True,
+            )
+        # Committed together with the deltas, so readers' caches notice them
+        batch.set(
+            self._stats_version_ref, {"version": firestore.Increment(1)}, merge=True
+        )
+        if commit:
+            batch.commit(retry=WRITE_RETRY)
+
+    def _fetch_page(self, start_ts, end_ts):
+        """
+        Fetch the games stored in a timestamp range.
+
+        Only the fields needed for the model stats are downloaded.
+
+        Args:
+            start_ts (int): Exclusive lower bound of the range.
+            end_ts (int): Inclusive upper bound of the range.
+
+        Returns:
+            list: Game result dicts.
+        """
+        query = (
+            self._games_ref.where("timestamp", ">", start_ts)
+            .where("timestamp", "<=", end_ts)
+            .select(STATS_FIELDS)
+        )
+        return [doc.to_dict() for doc in query.stream()]
+
+    def _fetch_games_since(self, start_ts):
+        """
+        Yield all games stored at or after start_ts.
+
+        The lower bound is inclusive: timestamps are whole seconds, so games
+        committed later in the same second as the last one seen must still
+        be found. Callers skip the games they already have.
+
+        The range up to now is split into HISTORY_FETCH_WORKERS buckets that
+        are queried concurrently, so the latency is that of the slowest page
+        rather than the sum of all pages. Pages are yielded as they arrive
+        and are not merged, so only the pages in flight are held in memory.
+
+        Args:
+            start_ts (int): Inclusive lower bound, or a negative value for all games.
+
+        Yields:
+            dict: Game result.
+        """
+        if start_ts < 0:
+            oldest = list(self._games_ref.order_by("timestamp").limit(1).stream())
+            if not oldest:
+                return
+            start_ts = oldest[0].to_dict().get("timestamp", 0)
+
+        # Pages have an exclusive lower bound
+        start_ts -= 1
+        end_ts = int(time.time())
+        if end_ts <= start_ts:
+            return
+
+        step = -(-(end_ts - start_ts) // HISTORY_FETCH_WORKERS)  # ceil division
+        bounds = [(lo, min(lo + step, end_ts)) for lo in range(start_ts, end_ts, step)]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(bounds)) as executor:
+            futures = [executor.submit(self._fetch_page, *bound) for bound in bounds]
+            for future in concurrent.futures.as_completed(futures):
+                yield from future.result()
+
+    def sync_model_stats(self):
+        """
+        Replay games not yet counted in the model stats.
+
+        Games written by store_game_result are already counted (they carry
+        "stats_applied"), so this only catches up on games stored before
+        incremental stats existed or by older writers. Each game is counted
+        and marked "stats_applied" in the same transaction, so a crash or a
+        concurrent sync never counts a game twice. The watermark is only a
+        hint of where to start scanning.
+
+        Returns:
+            int: Number of games added to the stats.
+        """
+        if not self.initialized:
+            logger.warning("Firebase not initialized. Cannot sync model stats.")
+            return 0
+
+        try:
+            watermark_ref = self.db.collection("model_stats_meta").document(
+                "watermark"
+            )
+            watermark_doc = watermark_ref.get()
+            last_timestamp = (
+                watermark_doc.to_dict().get("last_timestamp", -1)
+                if watermark_doc.exists
+                else -1
+            )
+
+            newest = last_timestamp
+            pending_refs = []
+            for game in self._fetch_games_since(last_timestamp):
+                newest = max(newest, game.get("timestamp", newest))
+                if not game.get("stats_applied") and game.get("game_id"):
+                    pending_refs.append(self._games_ref.document(game["game_id"]))
+
+            applied = 0
+            for start in range(0, len(pending_refs), SYNC_CHUNK_GAMES):
+                applied += self._apply_pending_games(
+                    pending_refs[start : start + SYNC_CHUNK_GAMES]
+                )
+            if newest != last_timestamp:
+                watermark_ref.set({"last_timestamp": newest})
+            return applied
+        except FIREBASE_ERRORS as e:
+            logger.error("Error syncing model stats: %s", e)
+            return 0
+
+    def _apply_pending_games(self, refs):
+        """
+        Count games into the model stats and mark them "stats_applied", in
+        one transaction.
+
+        The games are re-read in the transaction, so ones another sync has
+        counted in the meantime are skipped; on contention Firestore retries
+        the whole transaction.
+
+        Args:
+            refs (list): References of games that looked uncounted.
+
+        Returns:
+            int: Number of games added to the stats.
+        """
+
+        @firestore.transactional
+        def apply(transaction):
+            pending = [
+                doc
+                for doc in transaction.get_all(refs)
+                if doc.exists and not doc.to_dict().get("stats_applied")
+            ]
+            for doc in pending:
+                transaction.update(doc.reference, {"stats_applied": True})
+            self._update_model_stats(
+                _aggregate_games(doc.to_dict() for doc in pending), batch=transaction
+            )
+            return len(pending)
+
+        return apply(self.db.transaction())
+
     def get_game_log(self, game_id):
         """
         Get the log of a specific game from Firebase.
@@ -264,28 +1165,33 @@ class FirebaseManager:
             dict: Game log data including rounds and participant information.
         """
         if not self.initialized:
-            print("Firebase not initialized. Cannot get game log.")
+            logger.warning("Firebase not initialized. Cannot get game log.")
             return None
 
         try:
-            # Get game log from Firestore
-            log_doc = self.db.collection("game_logs").document(game_id).get()
+            # Fetch the log and the result (for participant roles) in one
+            # batched read instead of two sequential round-trips
+            log_ref = self._logs_ref.document(game_id)
+            result_ref = self._games_ref.document(game_id)
+            docs = {
+                doc.reference.path: doc
+                for doc in self.db.get_all([log_ref, result_ref])
+            }
+            log_doc = docs.get(log_ref.path)
+            result_doc = docs.get(result_ref.path)
 
-            if not log_doc.exists:
-                print(f"Game log not found for game ID: {game_id}")
+            if log_doc is None or not log_doc.exists:
+                logger.warning("Game log not found for game ID: %s", game_id)
                 return None
 
             log_data = log_doc.to_dict()
 
-            # Get game result to include participant roles
-            result_doc = self.db.collection("mafia_games").document(game_id).get()
-
-            if result_doc.exists:
+            if result_doc is not None and result_doc.exists:
                 result_data = result_doc.to_dict()
                 log_data["participants"] = result_data.get("participants", {})
                 log_data["winner"] = result_data.get("winner", "Unknown")
 
             return log_data
-        except Exception as e:
-            print(f"Error getting game log: {e}")
+        except FIREBASE_ERRORS as e:
+            logger.error("Error getting game log: %s", e)
             return None
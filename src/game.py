@@ -2,28 +2,139 @@
 Game logic for the LLM Mafia Game Competition.
 """
 
+import json
 import random
+import string
 import uuid
-from player import Player
-from game_templates import Role
+from collections import Counter, defaultdict
+from player import Player, index_players_by_name
+from game_templates import Role, DAY_WARNINGS, VOTING_REMINDERS
 import config
 from logger import GameLogger, Color
-import re
-import json
-from openrouter import get_llm_response
+from openrouter import (
+    get_llm_response_cached,
+    get_llm_json_response,
+    batch_chat_completions,
+    map_concurrent,
+    ERROR_RESPONSE,
+)
 from parsing import sanitize_model_response
 
+# Lowercases ASCII only, so offsets in the lowered copy match the original
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Обсуждение короче этого не содержит связей, ради которых стоит вызывать LLM
+MIN_GRAPH_CHARS = 200
+
+
+def _strip_think(text):
+    """
+    Remove <think>...</think> blocks (in any case) from text in a single pass.
+    An unterminated <think> removes everything after it.
+
+    Args:
+        text (str): Text to clean.
+
+    Returns:
+        str: The text without thinking blocks.
+    """
+    lowered = text.translate(_ASCII_LOWER)
+    parts = []
+    pos = 0
+    while True:
+        start = lowered.find("<think>", pos)
+        if start == -1:
+            parts.append(text[pos:])
+            break
+        parts.append(text[pos:start])
+        end = lowered.find("</think>", start + len("<think>"))
+        if end == -1:
+            break
+        pos = end + len("</think>")
+    return "".join(parts)
+
+
+def _parse_graph_edges(graph_text):
+    """
+    Extract relationship edges from the graph LLM's answer.
+
+    The answer is expected to be {"edges": [[source, relation, target], ...]}.
+    If it is not valid JSON, lines of the form "A -> relation -> B" are kept.
+
+    Args:
+        graph_text (str): The model's answer.
+
+    Returns:
+        list: Edge lines formatted as "A -> relation -> B".
+    """
+    # Модели иногда оборачивают JSON в ```json ... ``` — берем сам объект
+    start, end = graph_text.find("{"), graph_text.rfind("}")
+    edges = None
+    if start != -1:
+        try:
+            data = json.loads(graph_text[start:end + 1])
+            if isinstance(data, dict) and isinstance(data.get("edges"), list):
+                edges = data["edges"]
+        except json.JSONDecodeError:
+            pass
+
+    if edges is not None:
+        return [
+            " -> ".join(part.strip() for part in edge)
+            for edge in edges
+            if isinstance(edge, list)
+            and len(edge) == 3
+            and all(isinstance(part, str) and part.strip() for part in edge)
+        ]
+
+    # Запасной вариант — только строки с шаблоном A -> B -> C
+    lines = []
+    for raw_line in graph_text.splitlines():
+        line = raw_line.strip()
+        parts = line.split("->")
+        if len(parts) == 3 and all(part.strip() for part in parts):
+            lines.append(line)
+    return lines
+
+
+def _new_round_data(round_number=0):
+    """
+    Create the empty data record of a round.
+
+    Args:
+        round_number (int, optional): Number of the round.
+
+    Returns:
+        dict: Round data with empty messages, actions and outcome lists.
+    """
+    return {
+        "round_number": round_number,
+        "messages": [],
+        "actions": {},
+        "eliminations": [],
+        "eliminated_by_vote": [],
+        "targeted_by_mafia": [],
+        "protected_by_doctor": [],
+        "outcome": "",
+    }
+
 
 class MafiaGame:
     """Represents a Mafia game with LLM players."""
 
-    def __init__(self, models=None, language=None):
+    def __init__(self, models=None, language=None, seed=None, parallel_discussion=None):
         """
         Initialize a Mafia game.
 
         Args:
             models (list, optional): List of model names to use as players.
             language (str, optional): Language for game prompts and interactions. Defaults to config.LANGUAGE.
+            seed (int, optional): Seed of the game's random generator. Defaults to config.RANDOM_SEED.
+            parallel_discussion (bool, optional): Request the discussion sub-round
+                responses concurrently. Players then no longer see earlier
+                speakers of the same sub-round, which changes the game, so
+                results are not comparable with sequential games. Defaults to
+                config.PARALLEL_DISCUSSION (off unless enabled).
         """
         self.game_id = str(uuid.uuid4())
         self.round_number = 0
@@ -32,26 +143,41 @@ class MafiaGame:
         self.mafia_players: list[Player] = []
         self.doctor_player: Player | None = None
         self.villager_players: list[Player] = []
-        self.discussion_history = ""
+        # Alive players and alive counts by role, updated only by _kill
+        self._alive_players: list[Player] = []
+        self._alive_counts: Counter = Counter()
+        # Поля игроков параллельными кортежами (по индексу в self.players)
+        self._player_names: tuple = ()
+        self._player_roles: tuple = ()
+        self._player_models: tuple = ()
+        # Roles and models of all players, built once in setup_game
+        self.participants: dict = {}
+        # Сырые сообщения истории; строка собирается в discussion_history
+        self._discussion_chunks: list[str] = []
+        self._discussion_text: str | None = ""
+        # Сообщения истории без think-блоков, очищаются по одному при добавлении
+        self._clean_entries: list[str] = []
+        # Склеенный хвост _clean_entries, сбрасывается при добавлении сообщения
+        self._public_history: str | None = None
+        # Relationship graphs of this round, keyed by the discussion they describe
+        self._graph_cache: dict[str, str] = {}
         self.rounds_data = []
         self.language = language if language is not None else config.LANGUAGE
-        self.current_round_data = {
-            "round_number": 0,
-            "messages": [],
-            "actions": {},
-            "eliminations": [],
-            "eliminated_by_vote": [],  # Reset for the new round
-            "targeted_by_mafia": [],  # Reset for the new round
-            "protected_by_doctor": [],  # Reset for the new round
-            "outcome": "",
-        }
+        self.current_round_data = _new_round_data()
 
         # Use provided models or default from config
         self.models = models if models else [config.DEFAULT_MODEL]
 
-        # Set random seed if specified
-        if config.RANDOM_SEED is not None:
-            random.seed(config.RANDOM_SEED)
+        # Own random generator, so games running in parallel do not share
+        # (or reseed) the global one
+        self.rng = random.Random(seed if seed is not None else config.RANDOM_SEED)
+
+        # Если False, игроки в обсуждении видят реплики предыдущих говорящих
+        self.parallel_discussion = (
+            parallel_discussion
+            if parallel_discussion is not None
+            else config.PARALLEL_DISCUSSION
+        )
 
         # Initialize logger
         self.logger = GameLogger()
@@ -67,7 +193,7 @@ class MafiaGame:
         # Log game start
         self.logger.game_start(game_number, self.game_id, self.language)
 
-        selected_models = random.choices(self.models, k=config.PLAYERS_PER_GAME)
+        selected_models = self.rng.choices(self.models, k=config.PLAYERS_PER_GAME)
 
         # Assign roles
         roles = []
@@ -88,21 +214,21 @@ class MafiaGame:
             roles.append(Role.VILLAGER)
 
         # Shuffle roles
-        random.shuffle(roles)
+        self.rng.shuffle(roles)
 
         # Create players
         self.logger.header("PLAYER SETUP", Color.CYAN)
+        # Names not taken yet. A list (not a set) keeps seeded runs reproducible
+        available_names = list(player_names)
         for i, model_name in enumerate(selected_models):
             # Generate a random player name instead of using model name
             # Make sure we don't reuse names
-            used_names = [p.player_name for p in self.players]
-            available_names = [name for name in player_names if name not in used_names]
-
             # If we somehow run out of names, add a number to the model name
             if not available_names:
                 player_name = f"Player_{i+1}"
             else:
-                player_name = random.choice(available_names)
+                player_name = self.rng.choice(available_names)
+                available_names.remove(player_name)
 
             # Create player with both model_name and player_name
             player = Player(model_name, player_name, roles[i], language=self.language)
@@ -118,22 +244,25 @@ class MafiaGame:
 
             # Log player setup
             self.logger.player_setup(
-                player.model_name, player.role.value, player.player_name
+                player.model_name, player.role.label, player.player_name
             )
 
+        self._alive_players = list(self.players)
+        self._alive_counts = Counter(player.role for player in self.players)
+        self._player_names = tuple(player.player_name for player in self.players)
+        self._player_roles = tuple(player.role.label for player in self.players)
+        self._player_models = tuple(player.model_name for player in self.players)
+        self.participants = {
+            name: {"role": role, "model_name": model, "player_name": name}
+            for name, role, model in zip(
+                self._player_names, self._player_roles, self._player_models
+            )
+        }
+
         # Set phase to night
         self.phase = "night"
         self.round_number = 1
-        self.current_round_data = {
-            "round_number": self.round_number,
-            "messages": [],
-            "actions": {},
-            "eliminations": [],
-            "eliminated_by_vote": [],  # Reset for the new round
-            "targeted_by_mafia": [],  # Reset for the new round
-            "protected_by_doctor": [],  # Reset for the new round
-            "outcome": "",
-        }
+        self.current_round_data = _new_round_data(self.round_number)
 
         return True
 
@@ -144,27 +273,45 @@ class MafiaGame:
         Returns:
             str: The current game state.
         """
-        alive_count = sum(1 for p in self.players if p.alive)
-        mafia_count = sum(1 for p in self.mafia_players if p.alive)
-        villager_count = sum(1 for p in self.villager_players if p.alive)
-        doctor_count = 1 if self.doctor_player and self.doctor_player.alive else 0
-
-        state = f"Round {self.round_number}, {self.phase.capitalize()} phase. "
-        state += f"{alive_count} players alive ({mafia_count} Mafia, {villager_count + doctor_count} Villagers/Doctor). "
+        alive_count = len(self._alive_players)
+        mafia_count = self._alive_counts[Role.MAFIA]
+        villager_count = self._alive_counts[Role.VILLAGER]
+        doctor_count = self._alive_counts[Role.DOCTOR]
+
+        parts = [
+            f"Round {self.round_number}, {self.phase.capitalize()} phase. ",
+            f"{alive_count} players alive ({mafia_count} Mafia, {villager_count + doctor_count} Villagers/Doctor). ",
+        ]
 
         if self.round_number > 1:
-            state += f"In the previous round, {', '.join(self.current_round_data['eliminations'])} {'was' if len(self.current_round_data['eliminations']) == 1 else 'were'} eliminated. "
+            parts.append(
+                f"In the previous round, {', '.join(self.current_round_data['eliminations'])} {'was' if len(self.current_round_data['eliminations']) == 1 else 'were'} eliminated. "
+            )
 
-        return state
+        return "".join(parts)
 
     def get_alive_players(self):
         """
         Get a list of alive players.
 
+        The list is maintained by _kill; callers must not modify it.
+
         Returns:
             list: List of alive players.
         """
-        return [p for p in self.players if p.alive]
+        return self._alive_players
+
+    def _kill(self, player):
+        """
+        Mark a player as dead and update the alive list and counts.
+
+        Args:
+            player (Player): The player to eliminate.
+        """
+        player.alive = False
+        # New list, so lists already handed out by get_alive_players stay valid
+        self._alive_players = [p for p in self._alive_players if p is not player]
+        self._alive_counts[player.role] -= 1
 
     def check_game_over(self):
         """
@@ -174,9 +321,9 @@ class MafiaGame:
             tuple: (is_game_over, winner) where winner is "Mafia" or "Villagers" or None.
         """
         # Count alive players by role
-        mafia_alive = sum(1 for p in self.mafia_players if p.alive)
-        villagers_alive = sum(1 for p in self.villager_players if p.alive)
-        doctor_alive = 1 if self.doctor_player and self.doctor_player.alive else 0
+        mafia_alive = self._alive_counts[Role.MAFIA]
+        villagers_alive = self._alive_counts[Role.VILLAGER]
+        doctor_alive = self._alive_counts[Role.DOCTOR]
 
         # Check win conditions
         if mafia_alive == 0:
@@ -192,71 +339,112 @@ class MafiaGame:
 
         return False, None
 
+    @property
+    def discussion_history(self):
+        """
+        Full discussion history, including thinking blocks.
+
+        Joined from the appended messages on first access after a change.
+
+        Returns:
+            str: The discussion history.
+        """
+        if self._discussion_text is None:
+            self._discussion_text = "".join(self._discussion_chunks)
+        return self._discussion_text
+
     def discussion_history_without_thinkings(self):
         """
         Get the limited discussion history for the current round, excluding thinking messages.
         Removes any <think></think> or <THINK></THINK> tags and their contents.
         Shows only the N (config.DISCUSSION_HISTORY_LIMIT) latest messages.
+        Messages are cleaned once when the response is received, and the
+        joined tail is reused until the next message is appended.
         """
+        if self._public_history is None:
+            # Собираем последние N сообщений обратно с двумя переводами строк
+            entries = self._clean_entries[-config.DISCUSSION_HISTORY_LIMIT:]
+            self._public_history = '\n\n'.join(entries).strip()
+        return self._public_history
 
-        # Удаляем think-теги из всей истории
-        discussion_history = re.sub(
-            r"&lt;[tT][hH][iI][nN][kK]&gt;.*?&lt;/[tT][hH][iI][nN][kK]&gt;",
-            "",
-            self.discussion_history,
-            flags=re.DOTALL,
-        )
-        discussion_history = re.sub(
-            r"&lt;[tT][hH][iI][nN][kK]&gt;.*$",
-            "",
-            discussion_history,
-            flags=re.DOTALL,
-        )
-
-        # Разбиваем историю на сообщения по двоему переводу строк (каждое сообщение — отделено двумя \n)
-        # Можно еще .strip() убрать пустые строки по краям
-        entries = [entry for entry in discussion_history.strip().split('\n\n') if entry.strip()]
-        limit = config.DISCUSSION_HISTORY_LIMIT
+    def _append_history(self, text):
+        """
+        Append a message to the discussion history and its public entries.
 
-        # Оставляем только последние N сообщений
-        if len(entries) > limit:
-            entries = entries[-limit:]
+        Args:
+            text (str): The message without thinking blocks, ending with a blank line.
+        """
+        self._discussion_chunks.append(text)
+        self._discussion_text = None
 
-        # Собираем обратно с двумя переводами строк
-        return '\n\n'.join(entries).strip()
+        # Разбиваем сообщение по двойному переводу строк
+        self._clean_entries.extend(
+            entry for entry in text.strip().split('\n\n') if entry.strip()
+        )
+        self._public_history = None
 
     def discussion_graph_from_history(self):
         """
         Генерирует граф отношений между игроками на основе последних сообщений.
         Запрашивает LLM выделить явные связи: "X подозревает/доверяет Y" и т.д.
         Возвращает строку-граф для промпта или пустую строку, если ничего нет.
+
+        LLM не вызывается для слишком короткого обсуждения (MIN_GRAPH_CHARS)
+        и для обсуждения, не изменившегося с прошлого вызова в этом раунде.
         """
         discussion = self.discussion_history_without_thinkings()
-        if not discussion:
+        if len(discussion) < MIN_GRAPH_CHARS:
             return ""
+        if discussion in self._graph_cache:
+            return self._graph_cache[discussion]
 
         graph_prompt = (
             "Based only on the discussion history between players in a game of Mafia below, "
             "extract and list ALL explicit, clearly-stated *relationships* between players—such as direct suspicion, trust, voting, accusations, or alliance/support. "
             "DO NOT invent information, do NOT deduce, do NOT guess or imagine any relationships—list only those that are IMPLICITLY or EXPLICITLY PRESENT in the text. "
-            "Format: [SOURCE] -> [relation/action] -> [TARGET] (one edge per line).\n"
+            'Return ONLY a JSON object of the form {"edges": [["SOURCE", "relation/action", "TARGET"], ...]} with no prose.\n'
             "Discussion history:\n"
             f"{discussion}\n"
-            "\nList of relationship edges:"
+            "\nJSON with relationship edges:"
         )
 
         model_name = self.models[0]
-        graph_text = get_llm_response(model_name, graph_prompt)
-        # Очищаем результат — только строки с шаблоном A -> B -> C
-        lines = [
-            line.strip()
-            for line in graph_text.splitlines()
-            if re.match(r"^\w+(?: \w+)*\s*->\s*\w+\s*->\s*\w+(?: \w+)*$", line.strip())
-        ]
-        result = "\n".join(lines).strip()
+        graph_text = get_llm_response_cached(model_name, graph_prompt)
+        result = "\n".join(_parse_graph_edges(graph_text)).strip()
+        self._graph_cache[discussion] = result
         # Если нет ни одной валидной связи — вернем пусто
         return result
 
+    def _get_responses(self, player_prompts, phase=None, active_names=None):
+        """
+        Get LLM responses for independent prompts as one batch.
+
+        Each response is cleaned (and sanitized, if a phase is given) in the
+        worker that fetched it, while the other requests are still in flight.
+
+        Args:
+            player_prompts (list): List of (player, prompt) tuples.
+            phase (str, optional): Phase to sanitize the responses for.
+            active_names (list, optional): Names of the active players,
+                required with phase.
+
+        Returns:
+            list: Cleaned responses in the same order as player_prompts.
+        """
+        def finish(index, response):
+            player = player_prompts[index][0]
+            response = player.clean_response(response)
+            if phase is not None:
+                response = sanitize_model_response(
+                    response, player.player_name, active_names, phase
+                )
+            return response
+
+        return batch_chat_completions(
+            [(player.model_name, prompt) for player, prompt in player_prompts],
+            finish,
+        )
+
     def execute_night_phase(self):
         """
         Execute the night phase of the game.
@@ -270,34 +458,54 @@ class MafiaGame:
         for player in self.players:
             player.protected = False
 
+        alive_players = self.get_alive_players()
+        alive_names = [p.player_name for p in alive_players]
+        alive_by_name = index_players_by_name(alive_players)
+        night_mafia = [player for player in self.mafia_players if player.alive]
+        night_doctor = (
+            self.doctor_player
+            if self.doctor_player and self.doctor_player.alive
+            else None
+        )
+
+        # Build all night prompts first: they only depend on the state at
+        # the start of the night, so the LLM calls can run concurrently
+        state = self.get_game_state()
+        history = self.discussion_history_without_thinkings()
+        night_requests = []
+        for player in night_mafia:
+            # Generate prompt (English only)
+            game_state = f"{state} It's night time (Round {self.round_number}). As the Mafia, you MUST choose exactly one player to kill tonight. You cannot skip this action. End your response with ACTION: Kill [player]."
+            prompt = player.generate_prompt(
+                game_state,
+                alive_players,
+                self.mafia_players,
+                history,
+            )
+            # self.logger.event(
+            #     f"\n[NIGHT PHASE PROMPT for {player.player_name}]:\n{prompt}\n",
+            #     Color.YELLOW
+            # )
+            night_requests.append((player, prompt))
+
+        if night_doctor:
+            instruction = f"It's night time (Round {self.round_number}). As the Doctor, you MUST choose exactly one player to protect from the Mafia tonight. You cannot skip this action. End your response with ACTION: Protect [player]."
+            game_state = f"{state} {instruction}"
+            prompt = night_doctor.generate_prompt(
+                game_state,
+                alive_players,
+                None,
+                history,
+            )
+            night_requests.append((night_doctor, prompt))
+
+        # Ответы очищаются и санитизируются сразу по приходу, в потоках запросов
+        night_responses = self._get_responses(night_requests, "night", alive_names)
+
         # Get actions from Mafia players
         mafia_targets = []
-        alive_players = self.get_alive_players()
-        for player in self.mafia_players:
+        for player, response in zip(night_mafia, night_responses):
             if player.alive:
-                # Generate prompt (English only)
-                game_state = f"{self.get_game_state()} It's night time (Round {self.round_number}). As the Mafia, you MUST choose exactly one player to kill tonight. You cannot skip this action. End your response with ACTION: Kill [player]."
-                prompt = player.generate_prompt(
-                    game_state,
-                    alive_players,
-                    self.mafia_players,
-                    self.discussion_history_without_thinkings(),
-                )
-                # self.logger.event(
-                #     f"\n[NIGHT PHASE PROMPT for {player.player_name}]:\n{prompt}\n",
-                #     Color.YELLOW
-                # )
-                # print("ALIVE PLAYERS AT NIGHT:", [p.player_name for p in self.get_alive_players()])
-
-                # Get and sanitize response
-                response = player.get_response(prompt)
-                response = sanitize_model_response(
-                    response,
-                    player.player_name,
-                    [p.player_name for p in alive_players],
-                    "night"
-                )
-
                 self.logger.player_response(
                     player.player_name, "Mafia", response, player.player_name
                 )
@@ -314,7 +522,7 @@ class MafiaGame:
 
                 # Parse action
                 action_type, target = player.parse_night_action(
-                    response, alive_players
+                    response, alive_players, alive_by_name
                 )
 
                 if action_type == "kill" and target and target.role != Role.MAFIA and target.player_name != player.player_name:
@@ -334,30 +542,17 @@ class MafiaGame:
         kill_target = None
         if mafia_targets:
             # Count votes for each player_name
-            target_counts = {}
-            for target in mafia_targets:
-                if target.player_name in target_counts:
-                    target_counts[target.player_name] += 1
-                else:
-                    target_counts[target.player_name] = 1
+            target_counts = Counter(target.player_name for target in mafia_targets)
 
             # Find target with most votes (if tie, first in list wins)
-            max_votes = 0
-            for target_name, votes in target_counts.items():
-                if votes > max_votes:
-                    max_votes = votes
-                    # set kill_target by player_name
-                    for player in alive_players:
-                        if player.player_name == target_name:
-                            kill_target = player
-                            break
+            top_name, _ = target_counts.most_common(1)[0]
+            kill_target = alive_by_name.get(top_name.casefold())
 
         # No valid votes? Choose a random valid non-mafia target (auto-fallback)
         # if not kill_target:
         #     possible_targets = [p for p in alive_players if p.role != Role.MAFIA]
         #     if possible_targets:
-        #         import random
-        #         kill_target = random.choice(possible_targets)
+        #         kill_target = self.rng.choice(possible_targets)
         #         action_text = f"Auto-Kill {kill_target.player_name}"
         #         self.logger.player_action(
         #             "AUTO", "Mafia", action_text, ""
@@ -372,23 +567,8 @@ class MafiaGame:
 
         # Get action from Doctor (English only)
         protected_player = None
-        if self.doctor_player and self.doctor_player.alive:
-            instruction = f"It's night time (Round {self.round_number}). As the Doctor, you MUST choose exactly one player to protect from the Mafia tonight. You cannot skip this action. End your response with ACTION: Protect [player]."
-            game_state = f"{self.get_game_state()} {instruction}"
-            prompt = self.doctor_player.generate_prompt(
-                game_state,
-                alive_players,
-                None,
-                self.discussion_history_without_thinkings(),
-            )
-            # Get and sanitize response
-            response = self.doctor_player.get_response(prompt)
-            response = sanitize_model_response(
-                response,
-                self.doctor_player.player_name,
-                [p.player_name for p in alive_players],
-                "night"
-            )
+        if night_doctor:
+            response = night_responses[-1]
 
             self.logger.player_response(
                 self.doctor_player.player_name,
@@ -409,7 +589,7 @@ class MafiaGame:
 
             # Parse action
             action_type, target = self.doctor_player.parse_night_action(
-                response, alive_players
+                response, alive_players, alive_by_name
             )
 
             if action_type == "protect" and target and target.alive:
@@ -437,7 +617,7 @@ class MafiaGame:
         # Process night actions
         eliminated_players = []
         if kill_target and not getattr(kill_target, "protected", False):
-            kill_target.alive = False
+            self._kill(kill_target)
             eliminated_players.append(kill_target)
             self.current_round_data["eliminations"].append(kill_target.player_name)
             outcome_text = f"{kill_target.player_name} was killed by the Mafia."
@@ -498,30 +678,20 @@ class MafiaGame:
         )
 
         # Count votes
-        vote_counts = {}
-        vote_details = {}  # New dictionary to store who voted for whom
+        vote_counts = Counter(votes.values())
+        vote_details = defaultdict(list)  # Who voted for whom
         for voter, target_name in votes.items():
-            if target_name in vote_counts:
-                vote_counts[target_name] += 1
-            else:
-                vote_counts[target_name] = 1
-
-            # Store voter information for each target
-            if target_name not in vote_details:
-                vote_details[target_name] = []
             vote_details[target_name].append(voter)
+        # Plain dicts for the stored round data
+        vote_counts = dict(vote_counts)
+        vote_details = dict(vote_details)
 
-        # Find player with most votes
-        max_votes = 0
+        # Find player with most votes (if tie, first voted wins)
         eliminated_player = None
-
-        for target_name, vote_count in vote_counts.items():
-            if vote_count > max_votes:
-                max_votes = vote_count
-                for player in alive_players:
-                    if player.player_name == target_name:
-                        eliminated_player = player
-                        break
+        if vote_counts:
+            alive_by_name = {player.player_name: player for player in alive_players}
+            top_name = max(vote_counts, key=vote_counts.get)
+            eliminated_player = alive_by_name.get(top_name)
 
         # Eliminate player with most votes
         eliminated_players = []
@@ -552,7 +722,7 @@ class MafiaGame:
                     eliminated_player, vote_counts[eliminated_player.player_name]
                 )
 
-                eliminated_player.alive = False
+                self._kill(eliminated_player)
                 eliminated_players.append(eliminated_player)
                 self.current_round_data["eliminations"].append(
                     eliminated_player.player_name
@@ -586,7 +756,7 @@ class MafiaGame:
                     #         "speaker": eliminated_player.player_name,
                     #         "content": last_words,
                     #         "phase": "day",
-                    #         "role": eliminated_player.role.value,
+                    #         "role": eliminated_player.role.label,
                     #         "type": "last_words",
                     #         "player_name": eliminated_player.player_name,
                     #     }
@@ -613,20 +783,50 @@ class MafiaGame:
         # Set phase to night and increment round
         self.phase = "night"
         self.rounds_data.append(self.current_round_data)
+        self._graph_cache.clear()
         self.round_number += 1
-        self.current_round_data = {
-            "round_number": self.round_number,
-            "messages": [],
-            "actions": {},
-            "eliminations": [],
-            "eliminated_by_vote": [],  # Reset for the new round
-            "targeted_by_mafia": [],  # Reset for the new round
-            "protected_by_doctor": [],  # Reset for the new round
-            "outcome": "",
-        }
+        self.current_round_data = _new_round_data(self.round_number)
 
         return eliminated_players
 
+    def _build_day_prompt(self, player, alive_players, phase_type, phase_state, graph):
+        """
+        Build a player's day phase prompt.
+
+        Args:
+            player (Player): The player to prompt.
+            alive_players (list): Players alive at the start of the phase.
+            phase_type (str): "day_discussion" or "day_voting".
+            phase_state (str): Game state and phase instruction, shared by all speakers.
+            graph (str): Relationship graph of the discussion so far.
+
+        Returns:
+            str: The prompt.
+        """
+        # Генерация prompt-а: части собираются в список и склеиваются один раз
+        parts = [phase_state]
+
+        # Доп. предупреждения для докторов и мафии днем
+        day_warnings = DAY_WARNINGS.get(player.role)
+        if day_warnings:
+            parts.append(day_warnings.get(player.language, day_warnings["English"]))
+
+        if phase_type == "day_voting":
+            parts.append(
+                VOTING_REMINDERS.get(player.language, VOTING_REMINDERS["English"])
+            )
+        game_state = "".join(parts)
+
+        # В последовательной фазе история включает реплики предыдущих говорящих
+        discussion_context = f"{graph}\n{self.discussion_history_without_thinkings()}"
+
+        return player.generate_prompt(
+            game_state,
+            alive_players,
+            self.mafia_players if player.role == Role.MAFIA else None,
+            discussion_context,
+        )
+
     def _conduct_player_interactions(
             self,
             alive_players,
@@ -640,63 +840,59 @@ class MafiaGame:
         Conduct interactions with all alive players during the day phase.
         """
         active_names = [p.player_name for p in alive_players]
+        # Индекс игроков по имени для разбора голосов
+        by_name = index_players_by_name(alive_players)
+        # Словарь действий раунда создается в _new_round_data
+        actions = self.current_round_data["actions"]
+        # Состояние игры не меняется, пока говорят игроки одной фазы
+        phase_state = f"{self.get_game_state()} {instruction}"
+
+        # Граф отношений строится один раз на фазу (один LLM-запрос)
+        graph = self.discussion_graph_from_history()
+        if graph.strip() and config.GRAPH_DEBUG:
+            self.logger.log(
+                f"\n[VILLAGER GRAPH for {phase_type}]:\n{graph}", Color.CYAN
+            )
 
-        for player in alive_players:
-            # Генерация prompt-а
-            game_state = f"{self.get_game_state()} {instruction}"
-
-            # Доп. предупреждения для докторов и мафии днем
-            if player.role == Role.DOCTOR:
-                day_warnings = {
-                    "English": " IMPORTANT: This is the DAY phase. Do NOT use your protection ability now. Only use ACTION: Protect during night phase.",
-                    "Spanish": " IMPORTANTE: Esta es la fase DIURNA. NO uses tu habilidad de protección ahora. Solo usa ACCIÓN: Proteger durante la fase nocturna.",
-                    "French": " IMPORTANT: C'est la phase de JOUR. N'utilisez PAS votre capacité de protection maintenant. Utilisez ACTION: Protéger uniquement pendant la phase de nuit.",
-                    "Korean": " 중요: 지금은 낮 단계입니다. 지금은 보호 능력을 사용하지 마세요. 행동: 보호하기는 밤 단계에서만 사용하세요.",
-                }
-                warning = day_warnings.get(player.language, day_warnings["English"])
-                game_state += warning
-            elif player.role == Role.MAFIA:
-                day_warnings = {
-                    "English": " IMPORTANT: This is the DAY phase. Do NOT use 'ACTION: Kill' now. Instead, use 'VOTE: [player]' to vote like other villagers.",
-                    "Spanish": " IMPORTANTE: Esta es la fase DIURNA. NO uses 'ACCIÓN: Matar' ahora. En su lugar, usa 'VOTO: [jugador]' para votar como los demás aldeanos.",
-                    "French": " IMPORTANT: C'est la phase de JOUR. N'utilisez PAS 'ACTION: Tuer' maintenant. À la place, utilisez 'VOTE: [joueur]' pour voter comme les autres villageois.",
-                    "Korean": " 중요: 지금은 낮 단계입니다. '행동: 죽이기'를 사용하지 마세요. 대신 다른 마을 사람들처럼 '투표: [플레이어]'를 사용하여 투표하세요.",
-                }
-                warning = day_warnings.get(player.language, day_warnings["English"])
-                game_state += warning
-
-            if phase_type == "day_voting":
-                voting_reminders = {
-                    "English": " REMINDER: This is the VOTING PHASE. You MUST end your message with 'VOTE: [player]' to cast your vote.",
-                    "Spanish": " RECORDATORIO: Esta es la fase de VOTACIÓN. DEBES terminar tu mensaje con 'VOTO: [jugador]' para emitir tu voto.",
-                    "French": " RAPPEL: C'est la phase de VOTE. Vous DEVEZ terminer votre message par 'VOTE: [joueur]' pour exprimer votre vote.",
-                    "Korean": " 알림: 지금은 투표 단계입니다. 반드시 메시지 끝에 '투표: [플레이어]'를 포함하여 투표해야 합니다.",
-                }
-                reminder = voting_reminders.get(player.language, voting_reminders["English"])
-                game_state += reminder
-
-            graph = self.discussion_graph_from_history()
-            if graph.strip() and config.GRAPH_DEBUG:
-                self.logger.log(
-                    f"\n[VILLAGER GRAPH for {player.player_name}]:\n{graph}", Color.CYAN
+        # По умолчанию каждый говорящий видит реплики предыдущих. Если включено
+        # parallel_discussion, запросы фазы обсуждения идут параллельно, и игроки
+        # не видят реплик своего подраунда: это другие правила игры. Голосование
+        # всегда последовательное.
+        parallel = self.parallel_discussion and phase_type == "day_discussion"
+        if parallel:
+            responses = iter(
+                self._get_responses(
+                    [
+                        (
+                            player,
+                            self._build_day_prompt(
+                                player, alive_players, phase_type, phase_state, graph
+                            ),
+                        )
+                        for player in alive_players
+                    ],
+                    phase_type,
+                    active_names,
                 )
-            discussion_context = f"{graph}\n{self.discussion_history_without_thinkings()}"
-
-            prompt = player.generate_prompt(
-                game_state,
-                alive_players,
-                self.mafia_players if player.role == Role.MAFIA else None,
-                discussion_context,
             )
 
+        for index, player in enumerate(alive_players):
             # Получение и постобработка ответа
-            response = player.get_response(prompt)
-            sanitized = sanitize_model_response(
-                response,
-                player.player_name,
-                active_names,
-                phase_type,
-            )
+            if parallel:
+                # Уже санитизирован в потоке запроса
+                sanitized = next(responses)
+            else:
+                response = player.get_response(
+                    self._build_day_prompt(
+                        player, alive_players, phase_type, phase_state, graph
+                    )
+                )
+                sanitized = sanitize_model_response(
+                    response,
+                    player.player_name,
+                    active_names,
+                    phase_type,
+                )
 
             # Особая обработка: если после очистки осталось пусто, либо строка состоит только из "ACTION:" / "VOTE:" — пропускаем этот ответ (не логируем, не добавляем в историю)
             clean_test = sanitized.strip().upper()
@@ -707,56 +903,60 @@ class MafiaGame:
 
             # Логируем ответ (player_name вместо model_name)
             self.logger.player_response(
-                player.player_name, player.role.value, sanitized, player.player_name
+                player.player_name, player.role.label, sanitized, player.player_name
             )
 
+            # Think-блоки удаляются один раз здесь: в сообщения и историю
+            # попадает уже публичный текст
+            public_text = _strip_think(sanitized)
+
             # Добавление в историю и сообщения (player_name используется!)
             msg_data = {
                 "speaker": player.player_name,
-                "content": sanitized,
+                "content": public_text,
                 "phase": phase_type,
-                "role": player.role.value,
+                "role": player.role.label,
                 "player_name": player.player_name,
             }
             messages.append({
                 "speaker": player.player_name,
-                "content": sanitized,
+                "content": public_text,
                 "player_name": player.player_name,
             })
             self.current_round_data["messages"].append(msg_data)
 
             # Обработка голосов
             if collect_votes and votes is not None:
-                vote_target = player.parse_day_vote(sanitized, alive_players)
+                vote_target = player.parse_day_vote(sanitized, alive_players, by_name)
                 # Проверка таргета: валидный? не мертвый? не сам игрок?
-                if (not vote_target) or (vote_target.player_name == player.player_name) or (not vote_target.alive):
-                    # Выбираем случайно из живых не себя
-                    possible_targets = [p for p in alive_players if p.player_name != player.player_name]
-                    if possible_targets:
-                        import random
-                        vote_target = random.choice(possible_targets)
+                if vote_target is None or vote_target is player or not vote_target.alive:
+                    # Выбираем случайно из живых не себя: индекс из N-1 мест,
+                    # начиная со своего сдвинутый на один
+                    if len(alive_players) > 1:
+                        target_index = self.rng.randrange(len(alive_players) - 1)
+                        if target_index >= index:
+                            target_index += 1
+                        vote_target = alive_players[target_index]
                         auto_text = f"(auto-selected)"
                         self.logger.player_action(
                             player.player_name,
-                            player.role.value,
+                            player.role.label,
                             f"Vote {vote_target.player_name} {auto_text}",
                             player.player_name,
                         )
-                        self.current_round_data["actions"][player.player_name] = f"Vote {vote_target.player_name} {auto_text}"
+                        actions[player.player_name] = f"Vote {vote_target.player_name} {auto_text}"
                     else:
                         # голосовать больше не за кого
                         vote_target = None # нельзя голосовать
                 if vote_target:
                     votes[player.player_name] = vote_target.player_name
-                    if "actions" not in self.current_round_data:
-                        self.current_round_data["actions"] = {}
                     # В терминал и data — используем только player_name!
-                    if not self.current_round_data["actions"].get(player.player_name, None):
+                    if player.player_name not in actions:
                         action_text = f"Vote {vote_target.player_name}"
-                        self.current_round_data["actions"][player.player_name] = action_text
+                        actions[player.player_name] = action_text
                         self.logger.player_action(
                             player.player_name,
-                            player.role.value,
+                            player.role.label,
                             action_text,
                             player.player_name,
                         )
@@ -764,10 +964,10 @@ class MafiaGame:
                     self.logger.warning(
                         f"{player.player_name} failed to cast a valid vote during voting phase"
                     )
-                    self.current_round_data["actions"][player.player_name] = "Invalid vote"
+                    actions[player.player_name] = "Invalid vote"
 
             # Обновляем историю обсуждения
-            self.discussion_history += f"{player.player_name}: {sanitized}\n\n"
+            self._append_history(f"{player.player_name}: {public_text}\n\n")
 
     def get_last_words(self, player, vote_count):
         """
@@ -798,7 +998,7 @@ class MafiaGame:
         response = player.get_response(prompt)
         self.logger.player_response(
             player.model_name,
-            f"{player.role.value} (Last Words)",
+            f"{player.role.label} (Last Words)",
             response,
             player.player_name,
         )
@@ -828,19 +1028,21 @@ class MafiaGame:
         # Collect votes
         confirmation_votes = {"agree": [], "disagree": []}
 
-        for player in voting_players:
-            # Prepare game state for the player
-            game_state_str = self.get_game_state()
-            # Create a dictionary with the game state and the player to eliminate
-            player_state = {
-                "game_state": game_state_str,
-                "confirmation_vote_for": player_to_eliminate.player_name,
-                "confirmation_vote_for_model": player_to_eliminate.model_name,
-            }
+        # The game state and the player to eliminate are the same for every voter
+        player_state = {
+            "game_state": self.get_game_state(),
+            "confirmation_vote_for": player_to_eliminate.player_name,
+            "confirmation_vote_for_model": player_to_eliminate.model_name,
+        }
 
-            # Get player's vote
-            vote = player.get_confirmation_vote(player_state)
+        # Votes are independent LLM calls, so they are requested concurrently
+        # on the shared request pool and recorded afterwards in voter order
+        votes = map_concurrent(
+            lambda voter: voter.get_confirmation_vote(player_state),
+            voting_players,
+        )
 
+        for player, vote in zip(voting_players, votes):
             # Validate and record vote
             if vote.lower() in ["agree", "yes", "confirm", "true"]:
                 confirmation_votes["agree"].append(player.model_name)
@@ -899,29 +1101,23 @@ class MafiaGame:
         if self.current_round_data["round_number"] > 0:
             self.rounds_data.append(self.current_round_data)
 
-        # Create participants dictionary with both model_name and player_name
-        participants = {}
-        for player in self.players:
-            participants[player.player_name] = {
-                "role": player.role.value,
-                "model_name": player.model_name,
-                "player_name": player.player_name,
-            }
-
         # Generate game critic review
         critic_review = self.generate_critic_review(winner)
 
         # Log game end
         self.logger.game_end(game_number, winner, self.round_number)
 
-        return winner, self.rounds_data, participants, self.language, critic_review
+        return winner, self.rounds_data, self.participants, self.language, critic_review
 
-    def generate_critic_review(self, winner):
+    def generate_critic_review(self, winner, force_refresh=False):
         """
         Generate a game critic review using Claude via OpenRouter.
 
+        A stored review of an identical game summary is reused.
+
         Args:
             winner (str): The winning team ("Mafia" or "Villagers").
+            force_refresh (bool, optional): Ask the critic again even if a review is stored.
 
         Returns:
             dict: A dictionary containing the critic review with title, content, and one-sentence summary.
@@ -931,9 +1127,7 @@ class MafiaGame:
         game_summary = {
             "winner": winner,
             "rounds": self.round_number,
-            "participants": {
-                player.player_name: player.role.value for player in self.players
-            },
+            "participants": dict(zip(self._player_names, self._player_roles)),
             "eliminations": [],
         }
 
@@ -977,12 +1171,18 @@ class MafiaGame:
             # LOG: Показываем prompt для критика-LLM (если нужно)
             # print("\n[CRITIC REVIEW PROMPT]:\n" + prompt + "\n")
 
-            response_content = get_llm_response(model_name, prompt)
+            # Ответ стримится и обрывается сразу после закрытия JSON-объекта
+            response_content = get_llm_response_cached(
+                model_name,
+                prompt,
+                force_refresh=force_refresh,
+                fetch=get_llm_json_response,
+            )
 
             # LOG: Показываем сырой ответ от модели
             # print("\n[CRITIC REVIEW RAW LLM RESPONSE]:\n" + str(response_content) + "\n")
 
-            if response_content == "ERROR: Could not get response":
+            if response_content == ERROR_RESPONSE:
                 print("[CRITIC REVIEW ERROR]: Model did not return a review.\n")
                 return {
                     "title": "Game Review Unavailable",
@@ -990,12 +1190,14 @@ class MafiaGame:
                     "one_liner": "Technical difficulties prevented our critic from witnessing this showdown.",
                 }
 
-            # Look for JSON in the response
-            json_match = re.search(r"({.*})", response_content, re.DOTALL)
+            # Look for JSON in the response: from the first "{" to the last "}"
+            # (also drops ```json fences around it)
+            start = response_content.find("{")
+            end = response_content.rfind("}")
 
-            if json_match:
+            if start != -1 and end > start:
                 try:
-                    review_json = json.loads(json_match.group(1))
+                    review_json = json.loads(response_content[start:end + 1])
                     # Ensure one_liner exists
                     if "one_liner" not in review_json:
                         review_json["one_liner"] = (
@@ -1036,7 +1238,7 @@ class MafiaGame:
             }
 
 
-player_names = [
+player_names = (
     "Alex",
     "Bailey",
     "Casey",
@@ -1076,4 +1278,4 @@ player_names = [
     "Val",
     "Winter",
     "Zion",
-]
\ No newline at end of file
+)
\ No newline at end of file
@@ -3,16 +3,99 @@ Game templates and constants for the LLM Mafia Game Competition.
 This file contains all the templates, patterns, and constants used in the game.
 """
 
+import functools
+import re
+import string
 import config
-from enum import Enum
+from enum import IntEnum
 
 
-class Role(Enum):
+class Role(IntEnum):
     """Enum for player roles in the game."""
 
-    MAFIA = "Mafia"
-    VILLAGER = "Villager"
-    DOCTOR = "Doctor"
+    MAFIA = 1
+    DOCTOR = 2
+    VILLAGER = 3
+
+    @property
+    def label(self):
+        """Display name of the role, as shown to players and stored in results."""
+        return ROLE_LABEL[self]
+
+
+ROLE_LABEL = {
+    Role.MAFIA: "Mafia",
+    Role.DOCTOR: "Doctor",
+    Role.VILLAGER: "Villager",
+}
+
+
+class Side(IntEnum):
+    """Enum for the teams that can win the game."""
+
+    MAFIA = 1
+    VILLAGERS = 2
+
+    @property
+    def label(self):
+        """Display name of the team, as reported by check_game_over and stored in results."""
+        return SIDE_LABEL[self]
+
+
+SIDE_LABEL = {
+    Side.MAFIA: "Mafia",
+    Side.VILLAGERS: "Villagers",
+}
+# Winner label -> team; a game without a winner has no entry
+SIDE_BY_LABEL = {label: side for side, label in SIDE_LABEL.items()}
+# Team that wins together with a player of the role
+ROLE_SIDE = {
+    Role.MAFIA: Side.MAFIA,
+    Role.DOCTOR: Side.VILLAGERS,
+    Role.VILLAGER: Side.VILLAGERS,
+}
+
+
+def compile_template(template, **fixed):
+    """
+    Parse a str.format template once into literal text and field names.
+
+    Only plain {field} placeholders are supported (no format specs or
+    conversions), which is all the templates in this file use.
+
+    Args:
+        template (str): The template.
+        **fixed: Field values known in advance. They are substituted now and
+            merged into the surrounding literal text.
+
+    Returns:
+        callable: render(**fields) returning the same text as
+            template.format(**fixed, **fields).
+    """
+    segments = []
+    pending = []
+    for literal, field, format_spec, conversion in string.Formatter().parse(template):
+        if format_spec or conversion:
+            raise ValueError(f"Unsupported placeholder {{{field}}} in template")
+        pending.append(literal)
+        if field is None:
+            continue
+        if field in fixed:
+            pending.append(str(fixed[field]))
+        else:
+            segments.append(("".join(pending), field))
+            pending = []
+    tail = "".join(pending)
+
+    def render(**fields):
+        parts = []
+        for literal, field in segments:
+            parts.append(literal)
+            parts.append(str(fields[field]))
+        parts.append(tail)
+        return "".join(parts)
+
+    return render
 
 
 # Constants for game rules by language
@@ -79,7 +162,11 @@ SOBRE LOS VOTOS DE CONFIRMACIÓN:
 """,
 }
 
-# Constants for prompt templates
+# Constants for prompt templates.
+# Every prompt opens with the player's own name ("You are {model_name}"), so
+# prompts of different players share no long prefix a server-side prefix
+# cache could reuse. The opening is part of how models are instructed, so it
+# is kept; nothing time- or game-id-dependent is placed before the rules
 PROMPT_TEMPLATES = {
     "English": {
         Role.MAFIA: """
@@ -415,50 +502,122 @@ THINKING_TAGS = {
     "Korean": f"IMPORTANT: 당신은 <think>당신의 개인적인 생각을 여기에 적으세요</think> 태그를 사용하여 개인적으로 생각할 수 있습니다.\n다른 플레이어는 이 태그 안에 있는 것을 볼 수 없습니다. 이를 사용하여 전략을 계획하세요.\n당신의 응답은 최대 {config.MAX_OUTPUT_TOKENS} 토큰으로 제한됩니다. 간결하고 집중적으로 작성하세요.",
 }
 
-# Constants for action patterns
+# Constants for action patterns (compiled once at import)
 ACTION_PATTERNS = {
     "English": {
-        Role.MAFIA: r"ACTION:\s*Kill\s+([A-Za-z][-A-Za-z]*)",
-        Role.DOCTOR: r"ACTION:\s*Protect\s+([A-Za-z][-A-Za-z]*)",
+        Role.MAFIA: re.compile(r"ACTION:\s*Kill\s+([A-Za-z][-A-Za-z]*)", re.IGNORECASE),
+        Role.DOCTOR: re.compile(r"ACTION:\s*Protect\s+([A-Za-z][-A-Za-z]*)", re.IGNORECASE),
     },
     "Spanish": {
-        Role.MAFIA: r"ACCIÓN:\s*Matar\s+([\w./-]+(?:[-:]\w+)*)",
-        Role.DOCTOR: r"ACCIÓN:\s*Proteger\s+([\w./-]+(?:[-:]\w+)*)",
+        Role.MAFIA: re.compile(r"ACCIÓN:\s*Matar\s+([\w./-]+(?:[-:]\w+)*)", re.IGNORECASE),
+        Role.DOCTOR: re.compile(r"ACCIÓN:\s*Proteger\s+([\w./-]+(?:[-:]\w+)*)", re.IGNORECASE),
     },
     "French": {
-        Role.MAFIA: r"ACTION:\s*Tuer\s+([\w./-]+(?:[-:]\w+)*)",
-        Role.DOCTOR: r"ACTION:\s*Protéger\s+([\w./-]+(?:[-:]\w+)*)",
+        Role.MAFIA: re.compile(r"ACTION:\s*Tuer\s+([\w./-]+(?:[-:]\w+)*)", re.IGNORECASE),
+        Role.DOCTOR: re.compile(r"ACTION:\s*Protéger\s+([\w./-]+(?:[-:]\w+)*)", re.IGNORECASE),
     },
     "Korean": {
-        Role.MAFIA: r"행동:\s*죽이기\s+([\w./-]+(?:[-:]\w+)*)",
-        Role.DOCTOR: r"행동:\s*보호하기\s+([\w./-]+(?:[-:]\w+)*)",
+        Role.MAFIA: re.compile(r"행동:\s*죽이기\s+([\w./-]+(?:[-:]\w+)*)", re.IGNORECASE),
+        Role.DOCTOR: re.compile(r"행동:\s*보호하기\s+([\w./-]+(?:[-:]\w+)*)", re.IGNORECASE),
     },
 }
 
-# Constants for vote patterns
+# Constants for vote patterns (compiled once at import)
 VOTE_PATTERNS = {
-    "English": r"VOTE:\s*([\w./-]+(?:[-:]\w+)*)",
-    "Spanish": r"VOTO:\s*([\w./-]+(?:[-:]\w+)*)",
-    "French": r"VOTE:\s*([\w./-]+(?:[-:]\w+)*)",
-    "Korean": r"투표:\s*([\w./-]+(?:[-:]\w+)*)",
+    "English": re.compile(r"VOTE:\s*([\w./-]+(?:[-:]\w+)*)", re.IGNORECASE),
+    "Spanish": re.compile(r"VOTO:\s*([\w./-]+(?:[-:]\w+)*)", re.IGNORECASE),
+    "French": re.compile(r"VOTE:\s*([\w./-]+(?:[-:]\w+)*)", re.IGNORECASE),
+    "Korean": re.compile(r"투표:\s*([\w./-]+(?:[-:]\w+)*)", re.IGNORECASE),
 }
 
-# Constants for confirmation vote patterns
+# Constants for confirmation vote patterns (matched against lowercased text)
 CONFIRMATION_VOTE_PATTERNS = {
     "English": {
-        "agree": r"\b(agree|yes|confirm|approve)\b",
-        "disagree": r"\b(disagree|no|reject|disapprove)\b",
+        "agree": re.compile(r"\b(agree|yes|confirm|approve)\b"),
+        "disagree": re.compile(r"\b(disagree|no|reject|disapprove)\b"),
     },
     "Spanish": {
-        "agree": r"\b(acuerdo|sí|confirmo|apruebo)\b",
-        "disagree": r"\b(desacuerdo|no|rechazo|desapruebo)\b",
+        "agree": re.compile(r"\b(acuerdo|sí|confirmo|apruebo)\b"),
+        "disagree": re.compile(r"\b(desacuerdo|no|rechazo|desapruebo)\b"),
     },
     "French": {
-        "agree": r"\b(d'accord|oui|confirme|approuve)\b",
-        "disagree": r"\b(pas d'accord|non|rejette|désapprouve)\b",
+        "agree": re.compile(r"\b(d'accord|oui|confirme|approuve)\b"),
+        "disagree": re.compile(r"\b(pas d'accord|non|rejette|désapprouve)\b"),
     },
     "Korean": {
-        "agree": r"\b(동의|예|확인|승인)\b",
-        "disagree": r"\b(반대|아니오|거부|불승인)\b",
+        "agree": re.compile(r"\b(동의|예|확인|승인)\b"),
+        "disagree": re.compile(r"\b(반대|아니오|거부|불승인)\b"),
+    },
+}
+
+# Agree/disagree words for languages whose patterns above are plain \b-bounded
+# words: such a pattern matches exactly when the word is one of the response's
+# \w+ tokens, so one tokenization replaces both searches. French has
+# multi-word answers and keeps the patterns.
+CONFIRMATION_VOTE_LITERALS = {
+    "English": (
+        frozenset({"agree", "yes", "confirm", "approve"}),
+        frozenset({"disagree", "no", "reject", "disapprove"}),
+    ),
+    "Spanish": (
+        frozenset({"acuerdo", "sí", "confirmo", "apruebo"}),
+        frozenset({"desacuerdo", "no", "rechazo", "desapruebo"}),
+    ),
+    "Korean": (
+        frozenset({"동의", "예", "확인", "승인"}),
+        frozenset({"반대", "아니오", "거부", "불승인"}),
+    ),
+}
+
+# Constants for day phase warnings (roles whose night action must not be used by day)
+DAY_WARNINGS = {
+    Role.DOCTOR: {
+        "English": " IMPORTANT: This is the DAY phase. Do NOT use your protection ability now. Only use ACTION: Protect during night phase.",
+        "Spanish": " IMPORTANTE: Esta es la fase DIURNA. NO uses tu habilidad de protección ahora. Solo usa ACCIÓN: Proteger durante la fase nocturna.",
+        "French": " IMPORTANT: C'est la phase de JOUR. N'utilisez PAS votre capacité de protection maintenant. Utilisez ACTION: Protéger uniquement pendant la phase de nuit.",
+        "Korean": " 중요: 지금은 낮 단계입니다. 지금은 보호 능력을 사용하지 마세요. 행동: 보호하기는 밤 단계에서만 사용하세요.",
+    },
+    Role.MAFIA: {
+        "English": " IMPORTANT: This is the DAY phase. Do NOT use 'ACTION: Kill' now. Instead, use 'VOTE: [player]' to vote like other villagers.",
+        "Spanish": " IMPORTANTE: Esta es la fase DIURNA. NO uses 'ACCIÓN: Matar' ahora. En su lugar, usa 'VOTO: [jugador]' para votar como los demás aldeanos.",
+        "French": " IMPORTANT: C'est la phase de JOUR. N'utilisez PAS 'ACTION: Tuer' maintenant. À la place, utilisez 'VOTE: [joueur]' pour voter comme les autres villageois.",
+        "Korean": " 중요: 지금은 낮 단계입니다. '행동: 죽이기'를 사용하지 마세요. 대신 다른 마을 사람들처럼 '투표: [플레이어]'를 사용하여 투표하세요.",
     },
 }
+
+# Constants for voting phase reminders
+VOTING_REMINDERS = {
+    "English": " REMINDER: This is the VOTING PHASE. You MUST end your message with 'VOTE: [player]' to cast your vote.",
+    "Spanish": " RECORDATORIO: Esta es la fase de VOTACIÓN. DEBES terminar tu mensaje con 'VOTO: [jugador]' para emitir tu voto.",
+    "French": " RAPPEL: C'est la phase de VOTE. Vous DEVEZ terminer votre message par 'VOTE: [joueur]' pour exprimer votre vote.",
+    "Korean": " 알림: 지금은 투표 단계입니다. 반드시 메시지 끝에 '투표: [플레이어]'를 포함하여 투표해야 합니다.",
+}
+
+# Prompt templates are parsed lazily, once per player (see compile_template)
+@functools.lru_cache(maxsize=256)
+def prompt_renderer(language, role, player_name):
+    """
+    Compile the prompt template of a player once, with the parts that never
+    change for that player (name, rules, thinking tag) already filled in.
+
+    Args:
+        language (str): Language with an entry in PROMPT_TEMPLATES.
+        role (Role): The player's role.
+        player_name (str): The player's visible name.
+
+    Returns:
+        callable: render(**fields) for the remaining per-turn fields
+            (game_state, player_names, discussion_history, mafia_members).
+    """
+    return compile_template(
+        PROMPT_TEMPLATES[language][role],
+        model_name=player_name,
+        game_rules=GAME_RULES[language],
+        thinking_tag=THINKING_TAGS[language],
+    )
+
+
+COMPILED_CONFIRMATION_VOTE_TEMPLATES = {
+    language: compile_template(template)
+    for language, template in CONFIRMATION_VOTE_TEMPLATES.items()
+}
@@ -9,12 +9,15 @@ from firebase_manager import FirebaseManager
 
 def initialize_database():
     """Initialize the Firebase database with sample game data."""
-    firebase = FirebaseManager()
+    firebase = FirebaseManager.instance()
 
     if not firebase.initialized:
         print("Firebase not initialized. Cannot initialize database.")
         return False
 
+    # Count games stored by older writers before adding new ones
+    firebase.sync()
+
     # Create sample game data
     sample_games = [
         {
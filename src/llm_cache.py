@@ -0,0 +1,110 @@
+"""
+On-disk cache of LLM responses for the LLM Mafia Game Competition.
+Responses are stored in SQLite, keyed by a hash of the model name and prompt.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import config
+
+# Cache connection, opened on first use
+_connection = None
+_lock = threading.Lock()
+
+
+def _get_connection():
+    """
+    Open the SQLite response cache once.
+
+    Returns:
+        sqlite3.Connection: The cache connection, or None if disabled or unavailable.
+    """
+    global _connection
+    if not config.LLM_CACHE_PATH:
+        return None
+
+    with _lock:
+        if _connection is None:
+            try:
+                connection = sqlite3.connect(
+                    config.LLM_CACHE_PATH, check_same_thread=False
+                )
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, "
+                    "created REAL NOT NULL, "
+                    "response TEXT NOT NULL)"
+                )
+                connection.commit()
+                _connection = connection
+            except sqlite3.Error as e:
+                print(f"Error opening LLM response cache: {e}")
+                return None
+    return _connection
+
+
+def cache_key(model_name, prompt):
+    """
+    Build the cache key of a request.
+
+    Args:
+        model_name (str): The name of the LLM model.
+        prompt (str): The prompt sent to the model.
+
+    Returns:
+        str: Hex sha256 of the model name and prompt.
+    """
+    return hashlib.sha256(f"{model_name}\0{prompt}".encode()).hexdigest()
+
+
+def get_cached(model_name, prompt):
+    """
+    Look up a stored response younger than config.LLM_CACHE_TTL seconds.
+
+    Args:
+        model_name (str): The name of the LLM model.
+        prompt (str): The prompt sent to the model.
+
+    Returns:
+        str: The stored response, or None if there is none.
+    """
+    connection = _get_connection()
+    if connection is None:
+        return None
+
+    try:
+        with _lock:
+            row = connection.execute(
+                "SELECT response FROM responses WHERE key = ? AND created > ?",
+                (cache_key(model_name, prompt), time.time() - config.LLM_CACHE_TTL),
+            ).fetchone()
+    except sqlite3.Error as e:
+        print(f"Error reading LLM response cache: {e}")
+        return None
+    return row[0] if row else None
+
+
+def put_cached(model_name, prompt, response):
+    """
+    Store a response, replacing any older one for the same request.
+
+    Args:
+        model_name (str): The name of the LLM model.
+        prompt (str): The prompt sent to the model.
+        response (str): The model's response.
+    """
+    connection = _get_connection()
+    if connection is None:
+        return
+
+    try:
+        with _lock, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                (cache_key(model_name, prompt), time.time(), response),
+            )
+    except sqlite3.Error as e:
+        print(f"Error writing LLM response cache: {e}")
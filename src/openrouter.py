@@ -4,15 +4,95 @@ This module handles all interactions with the OpenRouter API.
 """
 
 import json
+import concurrent.futures
+import itertools
 import requests
+from requests.adapters import HTTPAdapter
 import config
 import time
 import random
 from logger import GameLogger
+from llm_cache import get_cached, put_cached
 
 # Create a logger instance for model-specific issues
 model_logger = GameLogger(log_to_file=True)
 
+# Returned instead of a model response when the request fails
+ERROR_RESPONSE = "ERROR: Could not get response"
+
+# Concurrent LLM requests across all games running at once
+_MAX_WORKERS = config.MAX_CONCURRENCY * max(1, config.PARALLEL_GAMES)
+
+
+# Hosts whose connection pools the session keeps: one per API replica
+_POOL_HOSTS = max(
+    4, len(set(config.LLM_API_URLS).union(*config.MODEL_API_URLS.values()))
+)
+
+
+def _new_session(max_workers):
+    """Create the keep-alive API session with a connection per concurrent request."""
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=_POOL_HOSTS, pool_maxsize=max_workers),
+    )
+    session.mount(
+        "http://",
+        HTTPAdapter(pool_connections=_POOL_HOSTS, pool_maxsize=max_workers),
+    )
+    return session
+
+
+# Shared keep-alive connections to the API, sized for concurrent requests
+_session = _new_session(_MAX_WORKERS)
+
+# Worker threads for batches, started once and reused by every phase
+_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=_MAX_WORKERS, thread_name_prefix="llm"
+)
+
+
+# Requests are spread round-robin over the API replicas in config.LLM_API_URLS
+# (or a model's own URLs in config.MODEL_API_URLS); next() on itertools.count
+# is atomic, so worker threads can share it
+_request_counter = itertools.count()
+
+
+def _next_api_url(model_name):
+    """Return the API URL for the next request to a model."""
+    urls = config.MODEL_API_URLS.get(model_name, config.LLM_API_URLS)
+    if len(urls) == 1:
+        return urls[0]
+    return urls[next(_request_counter) % len(urls)]
+
+
+def set_parallel_games(parallel_games):
+    """
+    Size the shared request pool for this many games running at once.
+
+    All games put their requests on the one shared pool, so the API sees
+    the turns of every running game together. The pool is sized from
+    config.PARALLEL_GAMES at import; call this before starting a run with a
+    different number of concurrent games, while no requests are in flight.
+
+    Args:
+        parallel_games (int): Number of games that run at the same time.
+    """
+    global _MAX_WORKERS, _session, _executor
+    max_workers = config.MAX_CONCURRENCY * max(1, parallel_games)
+    if max_workers == _MAX_WORKERS:
+        return
+
+    old_session, old_executor = _session, _executor
+    _MAX_WORKERS = max_workers
+    _session = _new_session(max_workers)
+    _executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="llm"
+    )
+    old_executor.shutdown(wait=False)
+    old_session.close()
+
 
 def get_llm_response(model_name, prompt):
     """
@@ -43,8 +123,8 @@ def get_llm_response(model_name, prompt):
     }
 
     try:
-        response = requests.post(
-            config.OPENROUTER_API_URL,
+        response = _session.post(
+            _next_api_url(model_name),
             headers=headers,
             data=json.dumps(data),
             timeout=timeout,  # Use model-specific timeout
@@ -68,4 +148,183 @@ def get_llm_response(model_name, prompt):
         print(
             f"Error getting response from {model_name}: error: {e}, response: {response_text}"
         )
-        return "ERROR: Could not get response"
+        return ERROR_RESPONSE
+
+
+def get_llm_json_response(model_name, prompt):
+    """
+    Get a JSON object answer from an LLM model, streaming the response and
+    closing the stream as soon as the first top-level {...} object is complete.
+
+    Text the model writes after the object (commentary, closing fences) is
+    never downloaded. If the stream ends without a complete object, the whole
+    text is returned.
+
+    Args:
+        model_name (str): The name of the LLM model to use.
+        prompt (str): The prompt to send to the model.
+
+    Returns:
+        str: The response text up to the end of the JSON object.
+    """
+    model_config = config.MODEL_CONFIGS.get(model_name, {})
+    timeout = model_config.get("timeout", config.API_TIMEOUT)
+
+    headers = {
+        "Authorization": f"Bearer {config.OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+    }
+
+    data = {
+        "model": model_name,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": config.MAX_OUTPUT_TOKENS,
+        "stream": True,
+    }
+
+    parts = []
+    # Brace depth outside JSON strings; None until the first "{"
+    depth = None
+    in_string = False
+    escaped = False
+    try:
+        with _session.post(
+            _next_api_url(model_name),
+            headers=headers,
+            data=json.dumps(data),
+            timeout=timeout,
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                # Server-sent events: "data: {...}", ends with "data: [DONE]"
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                choices = json.loads(payload).get("choices") or [{}]
+                chunk = (choices[0].get("delta") or {}).get("content") or ""
+
+                # Most chunks contain nothing that changes the scan state;
+                # they are kept whole without walking them char by char
+                if depth is None:
+                    if "{" not in chunk:
+                        parts.append(chunk)
+                        continue
+                elif in_string:
+                    if not escaped and '"' not in chunk and "\\" not in chunk:
+                        parts.append(chunk)
+                        continue
+                elif '"' not in chunk and "{" not in chunk and "}" not in chunk:
+                    parts.append(chunk)
+                    continue
+
+                for i, char in enumerate(chunk):
+                    if depth is None:
+                        if char == "{":
+                            depth = 1
+                    elif in_string:
+                        if escaped:
+                            escaped = False
+                        elif char == "\\":
+                            escaped = True
+                        elif char == '"':
+                            in_string = False
+                    elif char == '"':
+                        in_string = True
+                    elif char == "{":
+                        depth += 1
+                    elif char == "}":
+                        depth -= 1
+                        if depth == 0:
+                            parts.append(chunk[:i + 1])
+                            return "".join(parts)
+                parts.append(chunk)
+        return "".join(parts)
+
+    except Exception as e:
+        print(f"Error streaming response from {model_name}: error: {e}")
+        return ERROR_RESPONSE
+
+
+def batch_chat_completions(requests_batch, postprocess=None):
+    """
+    Get responses for a batch of independent prompts.
+
+    The API has no synchronous batch endpoint, so the requests are sent
+    concurrently over the shared keep-alive session by a shared thread pool
+    (config.MAX_CONCURRENCY workers per parallel game). All requests of a
+    batch are in flight together, which lets the server batch them.
+
+    Args:
+        requests_batch (list): List of (model_name, prompt) tuples.
+        postprocess (callable, optional): Function (index, response) -> result
+            run in the worker thread as soon as that response arrives, so
+            cleanup of one response overlaps with the requests still in flight.
+
+    Returns:
+        list: Responses (or postprocess results) in the same order as requests_batch.
+    """
+    def fetch(indexed_request):
+        index, (model, prompt) = indexed_request
+        response = get_llm_response(model, prompt)
+        return postprocess(index, response) if postprocess else response
+
+    if len(requests_batch) <= 1:
+        return [fetch(request) for request in enumerate(requests_batch)]
+
+    return list(_executor.map(fetch, enumerate(requests_batch)))
+
+
+def map_concurrent(func, items):
+    """
+    Apply func to each item on the shared request pool.
+
+    For independent calls that each make their own LLM request (e.g. one
+    confirmation vote per player), so they share the connection pool and
+    concurrency limit with every other game instead of starting threads.
+    func must not wait on the pool itself.
+
+    Args:
+        func (callable): Function of one item.
+        items (list): Items to process.
+
+    Returns:
+        list: Results in the same order as items.
+    """
+    if len(items) <= 1:
+        return [func(item) for item in items]
+
+    return list(_executor.map(func, items))
+
+
+def get_llm_response_cached(model_name, prompt, force_refresh=False, fetch=None):
+    """
+    Get a response from an LLM model, reusing a stored response to the exact
+    same prompt if one is younger than config.LLM_CACHE_TTL seconds.
+
+    Only use this for prompts where a repeated answer is as good as a new
+    one (extraction, reviews of an identical game). Errors are never cached.
+
+    Args:
+        model_name (str): The name of the LLM model to use.
+        prompt (str): The prompt to send to the model.
+        force_refresh (bool, optional): Ask the model even if a response is stored.
+        fetch (callable, optional): Function (model_name, prompt) -> str used on
+            a cache miss. Defaults to get_llm_response.
+
+    Returns:
+        str: The response from the model.
+    """
+    if fetch is None:
+        fetch = get_llm_response
+    if not force_refresh:
+        cached = get_cached(model_name, prompt)
+        if cached is not None:
+            return cached
+
+    response = fetch(model_name, prompt)
+    if response != ERROR_RESPONSE:
+        put_cached(model_name, prompt, response)
+    return response
@@ -1,4 +1,154 @@
+import functools
+import itertools
 import re
+from dataclasses import dataclass
+
+try:
+    # RE2 работает за линейное время, без катастрофического перебора
+    import re2
+except ImportError:
+    re2 = None
+
+
+def _linear_re(pattern):
+    """
+    Compile a pattern with RE2 when google-re2 is installed, otherwise with re.
+
+    Only patterns that behave the same in both engines go through here:
+    no \\b or \\s (ASCII-only in RE2), flags are given inline.
+
+    Args:
+        pattern (str): Regular expression, starting with inline flags.
+
+    Returns:
+        Compiled pattern with the re.Pattern search/finditer/split/sub API.
+    """
+    if re2 is not None:
+        return re2.compile(pattern)
+    return re.compile(pattern)
+
+
+# Шаблоны без параметров компилируются один раз при импорте
+_YR_RE = _linear_re(r'(?i)your response')
+_YR_LINE_RE = _linear_re(r'(?im)^.*your response.*$\n?')
+# Начало среза: всё с этого места отбрасывается
+_DISCUSSION_CUT_RE = _linear_re(r'(?i)\n?(?:ACTION:|ACCIÓN:|VOTE:|PROTEGER|KILL)')
+_NIGHT_CUT_RE = _linear_re(r'(?i)\n?VOTE:')
+# "your response" и начало среза фазы за один проход
+_DISCUSSION_SCAN_RE = _linear_re(
+    r'(?i)(?P<yr>your response)|(?P<cut>\n?(?:ACTION:|ACCIÓN:|VOTE:|PROTEGER|KILL))'
+)
+_NIGHT_SCAN_RE = _linear_re(r'(?i)(?P<yr>your response)|(?P<cut>\n?VOTE:)')
+# Границы строк str.splitlines(), кроме "\n"
+_OTHER_LINE_BREAKS_RE = re.compile('[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+_VOTE_CMD_RE = re.compile(r'\bVOTE:\s*([^\s\n]+)', re.IGNORECASE)
+_ACTION_CMD_RE = re.compile(r'\bACTION:\s*[^\n]+', re.IGNORECASE)
+
+
+@dataclass(frozen=True, slots=True)
+class _PhaseSteps:
+    """
+    Phase-specific parts of the sanitize pipeline.
+
+    Attributes:
+        stop_words (tuple): Lowercase words that rule out the fast path.
+        scan_re: Fused "your response"/cut pattern, or None if nothing is cut.
+        cut_re: Cut pattern used after "your response" was handled, or None.
+        find_vote (bool): Whether to append a VOTE: command.
+        find_action (bool): Whether to append an ACTION: command.
+    """
+    stop_words: tuple
+    scan_re: object
+    cut_re: object
+    find_vote: bool
+    find_action: bool
+
+
+# Срез шага 3 уже убирает VOTE: (обсуждение и ночь) и ACTION: (обсуждение),
+# поэтому в этих фазах на шаге 6 их повторно не ищут
+_DISCUSSION_STEPS = _PhaseSteps(
+    ('your response', 'kill', 'proteger'), _DISCUSSION_SCAN_RE, _DISCUSSION_CUT_RE, False, False
+)
+_NIGHT_STEPS = _PhaseSteps(('your response',), _NIGHT_SCAN_RE, _NIGHT_CUT_RE, False, True)
+_DEFAULT_STEPS = _PhaseSteps(('your response',), None, None, True, True)
+# Фаза (в нижнем регистре) -> ее шаги; остальные фазы, включая голосование,
+# обрабатываются по умолчанию
+_PHASE_STEPS = {
+    'discussion': _DISCUSSION_STEPS,
+    'day_discussion': _DISCUSSION_STEPS,
+    'night': _NIGHT_STEPS,
+}
+
+
+def _trie_regex(words):
+    """
+    Build an alternation of words with common prefixes factored out,
+    e.g. Max, Morgan, Moriarty -> M(?:ax|or(?:gan|iarty)).
+
+    Args:
+        words (iterable): Non-empty strings to match.
+
+    Returns:
+        str: Regular expression matching exactly the given words.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        is_word = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not is_word:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if is_word else group
+
+    return build(trie)
+
+
+@functools.lru_cache(maxsize=128)
+def _other_names_re(names):
+    """
+    Compile the pattern of a line starting with another player's "Name:".
+    It is multiline, so one search finds the first such line in the response.
+
+    Args:
+        names (tuple): Sorted names of the other players.
+
+    Returns:
+        tuple: ("Name:" prefixes, compiled pattern). The pattern can only
+            match if one of the prefixes occurs in the text.
+    """
+    prefixes = tuple(f"{name}:" for name in names)
+    pattern = re.compile(
+        r'^[^\S\n]*(?:' + _trie_regex(names) + r'):',
+        re.MULTILINE,
+    )
+    return prefixes, pattern
+
+
+@functools.lru_cache(maxsize=128)
+def _own_name_res(name):
+    """
+    Compile the patterns of the player's own "Name:" prefix at the start.
+
+    Args:
+        name (str): The current player's name.
+
+    Returns:
+        tuple: (repeated prefix pattern, single prefix pattern).
+    """
+    escaped = re.escape(name)
+    return (
+        re.compile(r'^((?:' + escaped + r':\s*){2,})', re.IGNORECASE),
+        re.compile(r'^' + escaped + r':\s*', re.IGNORECASE),
+    )
+
 
 def sanitize_model_response(response: str, cur_player_name: str, list_active_names: list, phase: str) -> str:
     """
@@ -15,96 +165,149 @@ def sanitize_model_response(response: str, cur_player_name: str, list_active_nam
     if not response or not isinstance(response, str):
         return ""
 
+    # Функция чистая, поэтому повторы одного и того же ответа берутся из кэша;
+    # порядок имен не важен, они все равно сортируются
+    return _sanitize_cached(response, cur_player_name, frozenset(list_active_names), phase.lower())
+
+
+@functools.lru_cache(maxsize=2048)
+def _sanitize_cached(response, cur_player_name, active_names, phase_lower):
+    """
+    Memoized body of sanitize_model_response.
+
+    Args:
+        response (str): Non-empty model response.
+        cur_player_name (str): The current player's name.
+        active_names (frozenset): Names of the active players.
+        phase_lower (str): Lowercased phase name.
+
+    Returns:
+        str: The sanitized one-line response.
+    """
+    steps = _PHASE_STEPS.get(phase_lower, _DEFAULT_STEPS)
+
+    # Быстрый путь: без ":" нет ни чужих/своих "Имя:", ни VOTE:/ACTION:, и если
+    # нет "your response" (и KILL/PROTEGER в обсуждении), от ответа остается
+    # только первая строка. Только для ASCII, где lower() совпадает с IGNORECASE
+    if ':' not in response and response.isascii():
+        lowered = response.lower()
+        if not any(word in lowered for word in steps.stop_words):
+            return response.lstrip().partition('\n')[0].rstrip()
+
     # 1. Обрезаем всё по чужим "Имя: ..."
-    other_names = [name for name in list_active_names if name != cur_player_name]
+    other_names = tuple(sorted(name for name in active_names if name != cur_player_name))
     if other_names:
-        pattern = r'^\s*(?:' + '|'.join([re.escape(name) for name in other_names]) + r'):'
-        lines = response.splitlines()
-        cut_index = None
-        for idx, line in enumerate(lines):
-            if re.match(pattern, line):
-                cut_index = idx
+        prefixes, pattern = _other_names_re(other_names)
+        # Поиск подстрок дешевле regex; чаще всего чужих имен в ответе нет
+        match = None
+        if any(prefix in response for prefix in prefixes):
+            if _OTHER_LINE_BREAKS_RE.search(response) is None:
+                match = pattern.search(response)
+            else:
+                # Другие границы строк (\r\n, \r, ...): режем по splitlines() и
+                # склеиваем оставшиеся строки через "\n", как раньше
+                lines = response.splitlines()
+                for index, line in enumerate(lines):
+                    if pattern.match(line):
+                        response = '\n'.join(lines[:index])
+                        break
+        if match:
+            # Без перевода строки, завершавшего предыдущую строку
+            response = response[:max(match.start() - 1, 0)]
+
+    # Один проход ищет и "your response", и первый ACTION/VOTE для среза.
+    # Без "your response" шаг 2 ничего не меняет, и срез берется сразу;
+    # иначе шаги 2 и 3 выполняются по очереди, как раньше
+    scan_pattern = steps.scan_re
+    has_your_response = True
+    cut_start = None
+    if scan_pattern is not None:
+        has_your_response = False
+        for match in scan_pattern.finditer(response):
+            if match.lastgroup == 'yr':
+                has_your_response = True
                 break
-        if cut_index is not None:
-            response = '\n'.join(lines[:cut_index])
-
-    # 2. Обрезаем всё до второй строки "Your response"
-    yr_matches = list(re.finditer(r'(?i)your response', response))
-    if yr_matches:
-        if len(yr_matches) >= 2:
-            second_start = yr_matches[1].start()
-            end_of_line = response.find('\n', second_start)
-            if end_of_line == -1:
-                response = response[second_start + len('Your response') :]
+            if cut_start is None:
+                cut_start = match.start()
+
+    if not has_your_response:
+        if cut_start is not None:
+            response = response[:cut_start]
+    else:
+        # 2. Обрезаем всё до второй строки "Your response"
+        # Нужны только первые два совпадения, остальные не ищем
+        yr_matches = list(itertools.islice(_YR_RE.finditer(response), 2))
+        if yr_matches:
+            if len(yr_matches) >= 2:
+                second_start = yr_matches[1].start()
+                end_of_line = response.find('\n', second_start)
+                if end_of_line == -1:
+                    response = response[second_start + len('Your response') :]
+                else:
+                    response = response[end_of_line + 1 :]
             else:
-                response = response[end_of_line + 1 :]
-        else:
-            pattern = r'^.*your response.*$\n?'  # строка целиком
-            response = re.sub(pattern, '', response, flags=re.IGNORECASE | re.MULTILINE)
-
-    phase_lower = phase.lower()
-    phase_discussion = phase_lower in ['discussion', 'day_discussion']
-    phase_voting = phase_lower in ['vote', 'voting', 'day_voting']
-    phase_night = phase_lower == 'night'
-
-    # 3a. В обсуждении ACTION/VOTE — срезаем всё после них
-    if phase_discussion:
-        pattern = r'(?i)\n?(ACTION:|ACCIÓN:|VOTE:|PROTEGER|KILL)[^\n]*.*'
-        response = re.split(pattern, response)[0]
-
-    # 3b. В ночной фазе убираем VOTE
-    if phase_night:
-        pattern = r'(?i)\n?(VOTE:)[^\n]*.*'
-        response = re.split(pattern, response)[0]
+                # строка целиком
+                response = _YR_LINE_RE.sub('', response)
+
+        # 3. В обсуждении ACTION/VOTE, ночью VOTE — срезаем всё после них
+        # Достаточно первого совпадения: поиск останавливается на нем
+        if steps.cut_re is not None:
+            match = steps.cut_re.search(response)
+            if match:
+                response = response[:match.start()]
 
     # 4. Удалить пробелы и пустые строки в начале/конце
+    # (strip уже убирает и пустые строки по краям). Это единственная обрезка
+    # всего ответа: дальше \s* в шаблонах имени сам съедает пробелы после
+    # префикса, а первая строка и команды обрезаются по отдельности
     response = response.strip()
-    lines = response.split('\n')
-    while lines and not lines[0].strip():
-        lines.pop(0)
-    while lines and not lines[-1].strip():
-        lines.pop()
-    response = '\n'.join(lines).strip()
 
     # 5. Удаление дублирующихся "Имя: Имя: ..." в начале ответа (текущий игрок)
-    if cur_player_name:
-        pattern = r'^((?:' + re.escape(cur_player_name) + r':\s*){2,})'
-        match = re.match(pattern, response, re.IGNORECASE)
+    # Шаблоны сравнивают имя посимвольно, так что без ":" сразу после имени
+    # они не совпадут; обычно модель свое имя не пишет, и regex не нужен
+    if cur_player_name and response[len(cur_player_name):len(cur_player_name) + 1] == ':':
+        repeated_pattern, one_pattern = _own_name_res(cur_player_name)
+        match = repeated_pattern.match(response)
         if match:
-            cleaned = response[match.end():].lstrip()
-            response = cleaned
+            response = response[match.end():]
 
-        one_pattern = r'^' + re.escape(cur_player_name) + r':\s*'
-        response = re.sub(one_pattern, '', response, flags=re.IGNORECASE).lstrip()
+        response = one_pattern.sub('', response)
 
     # 6. Оставить только первую содержательную строку (и добавить приказ(ы) в конец)
     # Найдём все команды VOTE: и ACTION:
     # (ищем все, чтобы если вдруг VOTE встречается дважды — взять первый)
-    vote_match = re.search(r'\bVOTE:\s*([^\s\n]+)', response, re.IGNORECASE)
+    vote_match = None
+    if steps.find_vote:
+        vote_match = _VOTE_CMD_RE.search(response)
     # Любая ACTION: <что_угодно> до конца строки (например ACTION: Kill Bailey или ACTION: Protect Kai)
-    action_match = re.search(r'\bACTION:\s*[^\n]+', response, re.IGNORECASE)
+    action_match = None
+    if steps.find_action:
+        action_match = _ACTION_CMD_RE.search(response)
+
+    # Оставить первую значимую строку (не пустую). Ответ уже обрезан слева,
+    # так что это просто строка до первого перевода строки
+    first_line = response.partition('\n')[0].strip()
 
-    # Оставить первую значимую строку (не пустую)
-    first_line = ""
-    for line in response.split('\n'):
-        if line.strip():
-            first_line = line.strip()
-            break
+    # Без команд результат — сама первая строка, собирать нечего
+    if not (vote_match or action_match):
+        return first_line
 
     # Собираем результат
     result_parts = []
     if first_line:
         result_parts.append(first_line)
+    first_line_lower = first_line.lower()
     if vote_match:
         vote_cmd = vote_match.group(0).strip()
         # чтобы не дублировать, если уже кончается на этот vote_cmd
-        if vote_cmd.lower() not in first_line.lower():
+        if vote_cmd.lower() not in first_line_lower:
             result_parts.append(vote_cmd)
     if action_match:
         action_cmd = action_match.group(0).strip()
-        if action_cmd.lower() not in first_line.lower() and (not vote_match or action_cmd.lower() not in vote_match.group(0).lower()):
+        action_cmd_lower = action_cmd.lower()
+        if action_cmd_lower not in first_line_lower and (not vote_match or action_cmd_lower not in vote_match.group(0).lower()):
             result_parts.append(action_cmd)
 
-    response_one_line = " ".join(result_parts).strip()
+    response_one_line = " ".join(result_parts)
 
     return response_one_line
@@ -3,25 +3,57 @@ Player class for the LLM Mafia Game Competition.
 """
 
 import re
+import sys
 import config
 from openrouter import get_llm_response
 from game_templates import (
     Role,
     GAME_RULES,
     CONFIRMATION_VOTE_EXPLANATIONS,
-    PROMPT_TEMPLATES,
-    CONFIRMATION_VOTE_TEMPLATES,
+    prompt_renderer,
+    COMPILED_CONFIRMATION_VOTE_TEMPLATES,
     THINKING_TAGS,
     ACTION_PATTERNS,
     VOTE_PATTERNS,
     CONFIRMATION_VOTE_PATTERNS,
+    CONFIRMATION_VOTE_LITERALS,
 )
 from parsing import sanitize_model_response
 
+# Шаблоны компилируются один раз при импорте
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+_BLANK_LINES_RE = re.compile(r"\n\s*\n")
+# Имя жертвы мафии может состоять из нескольких слов
+_MAFIA_KILL_RE = re.compile(r"ACTION:\s*Kill\s+([A-Za-z][A-Za-z\s'-]*)", re.IGNORECASE)
+_WORD_RE = re.compile(r"\w+")
+
+
+def index_players_by_name(players):
+    """
+    Index players by case-folded player_name for action and vote parsing.
+
+    Args:
+        players (list): The players to index.
+
+    Returns:
+        dict: Case-folded player_name to Player.
+    """
+    return {p.name_key: p for p in players}
+
 
 class Player:
     """Represents an LLM player in the Mafia game."""
 
+    __slots__ = (
+        "model_name",
+        "player_name",
+        "name_key",
+        "role",
+        "alive",
+        "protected",
+        "language",
+    )
+
     def __init__(self, model_name, player_name, role, language=None):
         """
         Initialize a player.
@@ -32,8 +64,11 @@ class Player:
             role (Role): The role of the player in the game.
             language (str, optional): The language for the player. Defaults to English.
         """
-        self.model_name = model_name
-        self.player_name = player_name
+        # Interned: names are compared and used as dict keys all game long
+        self.model_name = sys.intern(model_name)
+        self.player_name = sys.intern(player_name)
+        # Case-folded once for name lookups in actions and votes
+        self.name_key = player_name.casefold()
         self.role = role
         self.alive = True
         self.protected = False  # Whether the player is protected by the doctor
@@ -41,7 +76,7 @@ class Player:
 
     def __str__(self):
         """Return a string representation of the player."""
-        return f"{self.player_name} ({self.role.value}) [Model: {self.model_name}]"
+        return f"{self.player_name} ({self.role.label}) [Model: {self.model_name}]"
 
     def _find_target_player(self, target_name, all_players, exclude_mafia=False):
         """
@@ -55,6 +90,7 @@ class Player:
         Returns:
             Player or None: The target player if found, None otherwise.
         """
+        target_key = target_name.casefold()
         for player in all_players:
             if not player.alive:
                 continue
@@ -62,7 +98,7 @@ class Player:
             if exclude_mafia and player.role == Role.MAFIA:
                 continue
 
-            if target_name.lower() in player.player_name.lower():
+            if target_key in player.name_key:
                 return player
 
         return None
@@ -96,8 +132,8 @@ class Player:
         # Get the appropriate language, defaulting to English if not supported
         language = self.language if self.language in GAME_RULES else "English"
 
-        # Get game rules for the player's language
-        game_rules = GAME_RULES[language]
+        # Name, rules and thinking tag are already in the player's template
+        render = prompt_renderer(language, self.role, self.player_name)
 
         if self.role == Role.MAFIA:
             # For Mafia members (using visible player names)
@@ -112,33 +148,24 @@ class Player:
             elif language == "Korean":
                 mafia_list = f"{', '.join(mafia_names) if mafia_names else '없음 (당신이 유일하게 남은 마피아입니다)'}"
 
-            prompt = PROMPT_TEMPLATES[language][Role.MAFIA].format(
-                model_name=self.player_name,  # Use player_name in prompts
-                game_rules=game_rules,
+            prompt = render(
                 mafia_members=mafia_list,
                 player_names=", ".join(player_names),
                 game_state=game_state,
-                thinking_tag=THINKING_TAGS[language],
                 discussion_history=discussion_history,
             )
         elif self.role == Role.DOCTOR:
             # For Doctor
-            prompt = PROMPT_TEMPLATES[language][Role.DOCTOR].format(
-                model_name=self.player_name,  # Use player_name in prompts
-                game_rules=game_rules,
+            prompt = render(
                 player_names=", ".join(player_names),
                 game_state=game_state,
-                thinking_tag=THINKING_TAGS[language],
                 discussion_history=discussion_history,
             )
         else:  # Role.VILLAGER
             # For Villagers
-            prompt = PROMPT_TEMPLATES[language][Role.VILLAGER].format(
-                model_name=self.player_name,  # Use player_name in prompts
-                game_rules=game_rules,
+            prompt = render(
                 player_names=", ".join(player_names),
                 game_state=game_state,
-                thinking_tag=THINKING_TAGS[language],
                 discussion_history=discussion_history,
             )
 
@@ -154,85 +181,127 @@ class Player:
         Returns:
             str: The response from the model with private thoughts removed.
         """
-        response = get_llm_response(self.model_name, prompt)
+        return self.clean_response(get_llm_response(self.model_name, prompt))
+
+    def clean_response(self, response):
+        """
+        Remove private thoughts and extra blank lines from a model response.
 
-        # Remove any <think></think> tags and their contents before sharing with other players
-        cleaned_response = re.sub(r"<think>.*?</think>", "", response, flags=re.DOTALL)
+        Args:
+            response (str): The raw response from the model.
+
+        Returns:
+            str: The cleaned response.
+        """
+        # Remove any <think></think> tags and their contents before sharing with other players.
+        # The regex only runs when there is a tag (most responses have none)
+        cleaned_response = response
+        if "<think>" in response:
+            cleaned_response = _THINK_RE.sub("", response)
 
         # Clean up any extra whitespace that might have been created
-        cleaned_response = re.sub(r"\n\s*\n", "\n\n", cleaned_response)
+        cleaned_response = _BLANK_LINES_RE.sub("\n\n", cleaned_response)
         cleaned_response = cleaned_response.strip()
 
         return cleaned_response
 
-    def parse_night_action(self, response, all_players):
+    def parse_night_action(self, response, all_players, players_by_name=None):
         """
         Parse the night action from the player's response.
 
         Args:
             response (str): The response from the player (already cleaned of thinking tags).
             all_players (list): List of all players in the game.
+            players_by_name (dict, optional): index_players_by_name(all_players),
+                built once per phase by the caller.
 
         Returns:
             tuple: (action_type, target_player) or (None, None) if no valid action.
         """
         if self.role == Role.MAFIA:
-            pattern = r"ACTION:\s*Kill\s+([A-Za-z][A-Za-z\s'-]*)"
-            match = re.search(pattern, response, re.IGNORECASE)
+            match = _MAFIA_KILL_RE.search(response)
             if match:
-                target_name = match.group(1).strip().rstrip('.:,; \t')
-                for p in all_players:
-                    if (
-                            p.player_name.lower() == target_name.lower()
-                            and p.alive
-                            and p.role != Role.MAFIA
-                            and p.player_name != self.player_name
-                    ):
-                        return "kill", p
+                if players_by_name is None:
+                    players_by_name = index_players_by_name(all_players)
+                target_key = match.group(1).strip().rstrip('.:,; \t').casefold()
+                p = players_by_name.get(target_key)
+                if (
+                        p is not None
+                        and p.alive
+                        and p.role != Role.MAFIA
+                        and p is not self
+                ):
+                    return "kill", p
             return None, None
 
         elif self.role == Role.DOCTOR:
             # Ищем паттерн защиты
             pattern = ACTION_PATTERNS.get(self.language, ACTION_PATTERNS["English"])[Role.DOCTOR]
-            match = re.search(pattern, response, re.IGNORECASE)
+            match = pattern.search(response)
             if match:
-                target_name = match.group(1).strip()
-                target_name = target_name.rstrip('.:,; \t')
-                for p in all_players:
-                    # Доктору можно защищать любого живого
-                    if p.player_name.lower() == target_name.lower() and p.alive:
-                        return "protect", p
+                if players_by_name is None:
+                    players_by_name = index_players_by_name(all_players)
+                target_key = match.group(1).strip().rstrip('.:,; \t').casefold()
+                p = players_by_name.get(target_key)
+                # Доктору можно защищать любого живого
+                if p is not None and p.alive:
+                    return "protect", p
             return None, None
 
         else:
             return None, None
 
-    def parse_day_vote(self, response, all_players):
+    def parse_day_vote(self, response, all_players, players_by_name=None):
         """
         Parse the day vote from the player's response.
 
         Args:
             response (str): The response from the player (already cleaned of thinking tags).
             all_players (list): List of all players in the game.
+            players_by_name (dict, optional): index_players_by_name(all_players),
+                built once per phase by the caller.
 
         Returns:
             Player or None: The player being voted for (по player_name), или None если голос невалиден/нет голоса.
         """
+        # Быстрый путь для английского: последний "VOTE:" без regex
+        if self.language == "English":
+            _, sep, tail = response.rpartition("VOTE:")
+            words = tail.split(None, 1) if sep else None
+            if words:
+                target = self._resolve_vote(
+                    words[0].strip(".,!?;:'\"*"), all_players, players_by_name
+                )
+                if target is not None:
+                    return target
+
         # Получаем паттерн поиска VOTE:
         pattern = VOTE_PATTERNS.get(self.language, VOTE_PATTERNS["English"])
-        match = re.search(pattern, response, re.IGNORECASE)
+        match = pattern.search(response)
 
         if match:
-            target_name_raw = match.group(1).strip()
-            # Сравниваем имена игроков только по player_name, регистр не важен
-            for p in all_players:
-                if (
-                        p.player_name.lower() == target_name_raw.lower() and
-                        p.player_name != self.player_name and
-                        p.alive
-                ):
-                    return p
-            # если нашли только себя или мертвого, игнорируем
+            return self._resolve_vote(match.group(1).strip(), all_players, players_by_name)
+        return None
+
+    def _resolve_vote(self, target_name_raw, all_players, players_by_name=None):
+        """
+        Find the alive player (other than this one) a vote names.
+
+        Args:
+            target_name_raw (str): The name written after the vote keyword.
+            all_players (list): List of all players in the game.
+            players_by_name (dict, optional): index_players_by_name(all_players).
+
+        Returns:
+            Player or None: The voted player, or None if the name is invalid.
+        """
+        # Сравниваем имена игроков только по player_name, регистр не важен
+        if players_by_name is None:
+            players_by_name = index_players_by_name(all_players)
+        p = players_by_name.get(target_name_raw.casefold())
+        if p is not None and p is not self and p.alive:
+            return p
+        # если нашли только себя или мертвого, игнорируем
         return None
 
     def get_confirmation_vote(self, game_state):
@@ -254,7 +323,7 @@ class Player:
         confirmation_explanation = CONFIRMATION_VOTE_EXPLANATIONS[language].format(
             player_to_eliminate=player_to_eliminate
         )
-        prompt = CONFIRMATION_VOTE_TEMPLATES[language].format(
+        prompt = COMPILED_CONFIRMATION_VOTE_TEMPLATES[language](
             model_name=self.player_name,  # только player_name!
             player_to_eliminate=player_to_eliminate,
             confirmation_explanation=confirmation_explanation,
@@ -271,13 +340,23 @@ class Player:
             "confirmation"
         ).lower()
 
+        literals = CONFIRMATION_VOTE_LITERALS.get(language)
+        if literals is not None:
+            # Ответы из отдельных слов: одно разбиение на слова вместо двух regex
+            # "disagree" и отсутствие ответа дают один результат, поэтому
+            # достаточно проверить слова согласия
+            agree_words = literals[0]
+            if not agree_words.isdisjoint(_WORD_RE.findall(response_clean)):
+                return "agree"
+            return "disagree"
+
         lang_patterns = CONFIRMATION_VOTE_PATTERNS.get(language, CONFIRMATION_VOTE_PATTERNS["English"])
         agree_pat = lang_patterns["agree"]
         disagree_pat = lang_patterns["disagree"]
 
-        if re.search(agree_pat, response_clean):
+        if agree_pat.search(response_clean):
             return "agree"
-        elif re.search(disagree_pat, response_clean):
+        elif disagree_pat.search(response_clean):
             return "disagree"
         else:
             # Не найден ответ — по умолчанию "disagree"
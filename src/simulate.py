@@ -3,13 +3,117 @@ Simulation script for the LLM Mafia Game Competition (LOCAL MODELS ONLY, MULTI-C
 """
 
 import time
-import random
 import concurrent.futures
-from collections import defaultdict
+import multiprocessing
+import queue
+import threading
+from dataclasses import dataclass
+import numpy as np
 import config
 from game import MafiaGame
+from game_templates import Role, Side, ROLE_SIDE, SIDE_LABEL, SIDE_BY_LABEL
 from firebase_manager import FirebaseManager
 from logger import GameLogger, Color
+from openrouter import set_parallel_games
+
+# Finished games are stored in Firebase together, once this many are
+# pending or the oldest pending one waited this many seconds
+FIREBASE_FLUSH_GAMES = 25
+FIREBASE_FLUSH_SECONDS = 2.0
+# Log lines of handled games waiting for the console; a full queue holds back
+# handle_result until the logger thread catches up
+LOG_QUEUE_SIZE = 1024
+
+
+# Counters of a model, in the column order of the stats array
+STAT_KEYS = (
+    "games",
+    "wins",
+    "mafia_games",
+    "mafia_wins",
+    "villager_games",
+    "villager_wins",
+    "doctor_games",
+    "doctor_wins",
+)
+(
+    GAMES,
+    WINS,
+    MAFIA_GAMES,
+    MAFIA_WINS,
+    VILLAGER_GAMES,
+    VILLAGER_WINS,
+    DOCTOR_GAMES,
+    DOCTOR_WINS,
+) = range(len(STAT_KEYS))
+
+# Indexed by Role value (MAFIA, DOCTOR, VILLAGER = 1, 2, 3; entry 0 is unused):
+# games column, wins column and team that wins with the role
+_GAMES_COLUMNS = np.array([0, MAFIA_GAMES, DOCTOR_GAMES, VILLAGER_GAMES])
+_WINS_COLUMNS = np.array([0, MAFIA_WINS, DOCTOR_WINS, VILLAGER_WINS])
+_ROLE_SIDES = np.array([0] + [ROLE_SIDE[role] for role in Role])
+
+
+@dataclass(frozen=True, slots=True)
+class GameResult:
+    """Outcome of one game, as handed from its worker to the simulation."""
+
+    game_number: int
+    # None if the game ended without a winner
+    winner: Side | None
+    rounds_data: list
+    participants: dict
+    game_id: str
+    language: str
+    # title/content/one_liner from MafiaGame.generate_critic_review
+    critic_review: dict | None
+    # Model name to counters, as from _count_game_stats
+    game_stats: dict
+
+
+def _count_game_stats(winner, players):
+    """
+    Count per-model stats of a single game.
+
+    Runs in the game's worker, so each game fills its own counters and the
+    simulation thread only adds them up. All increments of the game are
+    applied by one np.add.at over (model row, column) index arrays.
+
+    Args:
+        winner (Side): The winning team, or None if the game had no winner.
+        players (list): (Role, model) of every player.
+
+    Returns:
+        dict: Model name to an int64 array of counters in STAT_KEYS order.
+    """
+    if not players:
+        return {}
+
+    model_index = {}
+    model_rows = np.fromiter(
+        (model_index.setdefault(model, len(model_index)) for _, model in players),
+        dtype=np.intp,
+        count=len(players),
+    )
+    role_codes = np.fromiter(
+        (role for role, _ in players), dtype=np.intp, count=len(players)
+    )
+    # Integer compare against the team; no winner means nobody won
+    won = _ROLE_SIDES[role_codes] == (0 if winner is None else winner)
+
+    # Every player adds to games and its role's games; winners also to wins
+    # and its role's wins
+    rows = np.concatenate((model_rows, model_rows, model_rows[won], model_rows[won]))
+    columns = np.concatenate((
+        np.full(len(players), GAMES),
+        _GAMES_COLUMNS[role_codes],
+        np.full(int(won.sum()), WINS),
+        _WINS_COLUMNS[role_codes][won],
+    ))
+    counts = np.zeros((len(model_index), len(STAT_KEYS)), dtype=np.int64)
+    np.add.at(counts, (rows, columns), 1)
+    return {model: counts[row] for model, row in model_index.items()}
+
 
 def run_single_game(game_number, language=None, model_name=None):
     """
@@ -19,18 +123,26 @@ def run_single_game(game_number, language=None, model_name=None):
         language (optional)
         model_name (str): model to use for all players
     Returns:
-        tuple: (game_number, winner, rounds_data, participants, game_id, language, critic_review)
+        GameResult: The game's outcome and per-model stats
     """
-    game = MafiaGame(language=language)
+    # A distinct, reproducible seed per game when RANDOM_SEED is set
+    seed = config.RANDOM_SEED + game_number if config.RANDOM_SEED is not None else None
+    game = MafiaGame(language=language, seed=seed)
     winner, rounds_data, participants, language, critic_review = game.run_game(game_number)
-    return (
-        game_number,
-        winner,
-        rounds_data,
-        participants,
-        game.game_id,
-        language,
-        critic_review,
+    # Winner and roles become enums once here, so handling the result only
+    # compares integers
+    winner = SIDE_BY_LABEL.get(winner)
+    return GameResult(
+        game_number=game_number,
+        winner=winner,
+        rounds_data=rounds_data,
+        participants=participants,
+        game_id=game.game_id,
+        language=language,
+        critic_review=critic_review,
+        game_stats=_count_game_stats(
+            winner, [(player.role, player.model_name) for player in game.players]
+        ),
     )
 
 def run_simulation(
@@ -39,6 +151,7 @@ def run_simulation(
         max_workers=4,
         language=None,
         model_name=None,
+        use_processes=False,
 ):
 
     logger = GameLogger()
@@ -46,25 +159,21 @@ def run_simulation(
     start_time = time.time()
 
     # Initialize Firebase
-    firebase = FirebaseManager()
+    firebase = FirebaseManager.instance()
+    if firebase.initialized:
+        # Catch up on games stored while no simulation was running
+        firebase.sync()
     stats = {
         "total_games": num_games,
         "completed_games": 0,
         "mafia_wins": 0,
         "villager_wins": 0,
-        "model_stats": defaultdict(
-            lambda: {
-                "games": 0,
-                "wins": 0,
-                "mafia_games": 0,
-                "mafia_wins": 0,
-                "villager_games": 0,
-                "villager_wins": 0,
-                "doctor_games": 0,
-                "doctor_wins": 0,
-            }
-        ),
+        "model_stats": {},
     }
+    # Per-model counters: one row per model, columns in STAT_KEYS order.
+    # Rows for config.MODELS up front, other models get a row on first sight
+    model_ids = {model: i for i, model in enumerate(config.MODELS)}
+    counts = np.zeros((len(model_ids), len(STAT_KEYS)), dtype=np.int64)
 
     game_language = language if language is not None else config.LANGUAGE
     model_to_use = model_name or config.DEFAULT_MODEL
@@ -73,72 +182,132 @@ def run_simulation(
         logger.error("No model specified in config.MODELS!")
         return stats
 
+    # Games waiting to be stored, with the time the oldest one was added.
+    # Only handle_result (always on this thread) touches them
+    pending_games = []
+    pending_since = time.time()
+
+    # Flushed batches (results and their logs) are committed by a writer
+    # thread, so results keep being handled during a commit, and the run waits
+    # for the last commit before it returns. The bounded queue holds back
+    # handle_result only if the writer falls far behind
+    write_queue = queue.Queue(maxsize=2 * max(1, max_workers))
+
+    def write_batches():
+        while True:
+            batch = write_queue.get()
+            if batch is None:
+                return
+            # A failed batch must not stop the writer: handle_result would
+            # block on the full queue and later games would not be stored
+            try:
+                firebase.store_game_bundles(batch)
+            except Exception as e:
+                logger.error(f"Storing {len(batch)} games failed: {e}")
+
+    writer = threading.Thread(target=write_batches, name="firebase-writer", daemon=True)
+    writer.start()
+
+    # Console and log file output of finished games is written by its own
+    # thread, so handling the next result does not wait on the terminal.
+    # Items are (logger method, args), written in the order they were queued
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+
+    def write_logs():
+        while True:
+            item = log_queue.get()
+            if item is None:
+                return
+            log_method, args = item
+            log_method(*args)
+
+    log_writer = threading.Thread(target=write_logs, name="game-logger", daemon=True)
+    log_writer.start()
+
+    def flush_pending():
+        if pending_games:
+            write_queue.put(pending_games.copy())
+            pending_games.clear()
+
     # Sequential or parallel run
-    def handle_result(fut, game_number=None):  # utility for both code paths
+    def handle_result(result, game_number):  # GameResult of run_single_game
+        nonlocal pending_since, counts
         try:
-            (
-                game_number,
-                winner,
-                rounds_data,
-                participants,
-                game_id,
-                language,
-                critic_review,
-            ) = fut if isinstance(fut, tuple) else fut.result()
+            winner = result.winner
+            winner_label = SIDE_LABEL.get(winner)
             # Firebase
             if firebase.initialized:
-                firebase.store_game_result(
-                    game_id, winner, participants, language=language
-                )
-                firebase.store_game_log(
-                    game_id,
-                    rounds_data,
-                    participants,
-                    language=language,
-                    critic_review=critic_review,
-                )
+                if not pending_games:
+                    pending_since = time.time()
+                pending_games.append((
+                    result.game_id,
+                    winner_label,
+                    result.participants,
+                    result.rounds_data,
+                    result.language,
+                    result.critic_review,
+                ))
+                if (
+                        len(pending_games) >= FIREBASE_FLUSH_GAMES
+                        or time.time() - pending_since >= FIREBASE_FLUSH_SECONDS
+                ):
+                    flush_pending()
             # Stats
             stats["completed_games"] += 1
-            if winner == "Mafia":
+            if winner == Side.MAFIA:
                 stats["mafia_wins"] += 1
             else:
                 stats["villager_wins"] += 1
-            for player_name, role_data in participants.items():
-                # Modern format:
-                if isinstance(role_data, dict):
-                    role = role_data.get("role")
-                    model = role_data.get("model_name", model_to_use)
-                else:
-                    role = role_data
-                    model = model_to_use
-                stats["model_stats"][model]["games"] += 1
-                if role == "Mafia":
-                    stats["model_stats"][model]["mafia_games"] += 1
-                    if winner == "Mafia":
-                        stats["model_stats"][model]["mafia_wins"] += 1
-                        stats["model_stats"][model]["wins"] += 1
-                elif role == "Doctor":
-                    stats["model_stats"][model]["doctor_games"] += 1
-                    if winner == "Villagers":
-                        stats["model_stats"][model]["doctor_wins"] += 1
-                        stats["model_stats"][model]["wins"] += 1
-                else:
-                    stats["model_stats"][model]["villager_games"] += 1
-                    if winner == "Villagers":
-                        stats["model_stats"][model]["villager_wins"] += 1
-                        stats["model_stats"][model]["wins"] += 1
+            # Per-game counters were filled by the game's worker
+            for model, row in result.game_stats.items():
+                model_id = model_ids.get(model)
+                if model_id is None:
+                    model_id = model_ids[model] = len(model_ids)
+                    counts = np.vstack([counts, np.zeros(len(STAT_KEYS), dtype=np.int64)])
+                counts[model_id] += row
             # Log game
-            win_color = Color.RED if winner == "Mafia" else Color.GREEN
-            logger.print(
-                f"Game {game_number} completed. Winner: {winner}",
-                win_color,
-                bold=True,
-            )
+            win_color = Color.RED if winner == Side.MAFIA else Color.GREEN
+            log_queue.put((
+                logger.print,
+                (f"Game {game_number} completed. Winner: {winner_label}", win_color, True),
+            ))
+        except Exception as e:
+            log_queue.put((logger.error, (f"Game {game_number} generated an exception: {e}",)))
+
+    def handle_future(future, game_number):  # parallel path only
+        try:
+            # as_completed yields finished futures only: result() takes
+            # the future's lock once and returns without waiting
+            result = future.result()
         except Exception as e:
-            logger.error(f"Game {game_number if game_number is not None else '?'} generated an exception: {e}")
+            log_queue.put((logger.error, (f"Game {game_number} generated an exception: {e}",)))
+            return
+        handle_result(result, game_number)
 
     if parallel and num_games > 1:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # All games are submitted at once: a worker picks up the next game as
+        # soon as its current one ends, so a long game never holds back short
+        # ones. Waves of similar-length games would only add idle workers, and
+        # every game here has the same setup, so there is nothing to sort by
+        game_workers = min(max_workers, num_games)
+        if use_processes:
+            # Game logic runs without sharing the GIL. Spawned workers import
+            # everything afresh (forked ones would inherit dead pool threads)
+            # and each gets its own request pool for its one game
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=game_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=set_parallel_games,
+                initargs=(1,),
+            )
+        else:
+            # Turns of all running games share one request pool; make room for
+            # every game's concurrent requests
+            set_parallel_games(game_workers)
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=game_workers
+            )
+        with executor:
             future_to_game = {
                 executor.submit(
                     run_single_game,
@@ -149,12 +318,27 @@ def run_simulation(
                 for i in range(1, num_games + 1)
             }
             for future in concurrent.futures.as_completed(future_to_game):
-                game_number = future_to_game[future]
-                handle_result(future, game_number)
+                # Popped so a handled game's future, and its rounds data, can
+                # be freed before the rest of the simulation finishes
+                game_number = future_to_game.pop(future)
+                handle_future(future, game_number)
     else:
         for i in range(1, num_games + 1):
             res = run_single_game(i, game_language, model_to_use)
             handle_result(res, i)
+    flush_pending()
+    write_queue.put(None)
+    writer.join()
+    # All game lines are out before the summary
+    log_queue.put(None)
+    log_writer.join()
+
+    # Back to the dict shape of the stats, for models that played
+    stats["model_stats"] = {
+        model: dict(zip(STAT_KEYS, counts[model_id].tolist()))
+        for model, model_id in model_ids.items()
+        if counts[model_id, GAMES]
+    }
 
     elapsed_time = time.time() - start_time
     stats["elapsed_time"] = elapsed_time
@@ -168,7 +352,44 @@ def run_simulation(
     print(f"Побед мирных: {village}   ({village/num:.1%})")
     return stats
 
+def run_tournament_parallel(
+        num_games=config.NUM_GAMES,
+        max_concurrent=config.PARALLEL_GAMES,
+        language=None,
+        model_name=None,
+        use_processes=config.USE_PROCESSES,
+):
+    """
+    Run a tournament with up to max_concurrent games in flight at once.
+
+    Games are independent, so each runs in its own worker thread (or process)
+    with its own MafiaGame state; results are merged into one stats dict as
+    they finish.
+    LLM requests of all games share the connection pool and response cache.
+
+    Args:
+        num_games (int): Number of games to play.
+        max_concurrent (int): Maximum number of games running at the same time.
+        language (str, optional): Game language. Defaults to config.LANGUAGE.
+        model_name (str, optional): Model for all players. Defaults to config.DEFAULT_MODEL.
+        use_processes (bool, optional): Run games in worker processes instead
+            of threads, so their Python work is not serialized by the GIL.
+            Results are still merged and stored by this process.
+
+    Returns:
+        dict: Aggregated tournament statistics.
+    """
+    return run_simulation(
+        num_games=num_games,
+        parallel=max_concurrent > 1,
+        max_workers=max_concurrent,
+        language=language,
+        model_name=model_name,
+        use_processes=use_processes,
+    )
+
 if __name__ == "__main__":
-    if config.RANDOM_SEED is not None:
-        random.seed(config.RANDOM_SEED)
-    run_simulation(num_games=config.NUM_GAMES)
+    run_tournament_parallel(
+        num_games=config.NUM_GAMES,
+        max_concurrent=config.PARALLEL_GAMES,
+    )